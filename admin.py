@@ -0,0 +1,15 @@
+# admin.py
+
+import hmac
+
+from flask import current_app, request
+
+
+def is_admin() -> bool:
+    """
+    True when the request's X-Admin-Token header equals the app's
+    ADMIN_TOKEN (IPL_ADMIN_TOKEN). Always False when no token is set.
+    """
+    token = current_app.config.get("ADMIN_TOKEN")
+    given = request.headers.get("X-Admin-Token", "")
+    return bool(token) and hmac.compare_digest(given.encode(), token.encode())
@@ -1,17 +1,78 @@
 import os
 from datetime import datetime
-from functools import lru_cache
 
-import pandas as pd
 from flask import Flask, render_template, request, jsonify
 
-from pointValue import compute_top25_players
+from compact import memory_report
+from compression import DEFAULT_MIN_BYTES, register_compression
+from data_handle import DataHandle, register_data_handle
+from datastore import DataContext
+from http_cache import DEFAULT_MAX_AGE, register_http_cache
+from ingest import DEFAULT_POLL_SECONDS, csv_stats, register_ingest
+from json_provider import FastJSONProvider
+from metrics import register_metrics
+from profiling import register_profiling, span, start_process_trace
+from reload import register_reload
+from result_cache import DEFAULT_MAX_BYTES, register_result_cache
+from snapshot import load_dataset
+from static_export import register_static_api
 
 BASE = os.path.dirname(os.path.abspath(__file__))
-matches = pd.read_csv(os.path.join(BASE, "data", "matches.csv"), parse_dates=["date"])
-deliveries = pd.read_csv(os.path.join(BASE, "data", "deliveries.csv"))
+# IPL_TRACE_FILE=trace.json records every span() (startup included) and
+# writes them as a Chrome trace at exit
+if os.environ.get("IPL_TRACE_FILE"):
+    start_process_trace(os.environ["IPL_TRACE_FILE"])
+# IPL_DATA_DIR points at another matches.csv/deliveries.csv pair (e.g. benchmarks)
+DATA_DIR = os.environ.get("IPL_DATA_DIR", os.path.join(BASE, "data"))
+# IPL_SNAPSHOT=0 forces a plain CSV parse (no data/snapshot/ cache)
+USE_SNAPSHOT = os.environ.get("IPL_SNAPSHOT", "1") != "0"
+# where ingest picks up rows appended after this load
+CSV_STATS = csv_stats(DATA_DIR)
+with span("startup.load_dataset"):
+    matches, deliveries, DATA_VERSION = load_dataset(DATA_DIR, USE_SNAPSHOT)
+print(memory_report(matches, deliveries))
 
 app = Flask(__name__, static_folder="frontend", static_url_path="")
+# jsonify takes DataFrames/NumPy values as they are and writes NaN as null
+# (encoded by orjson when it's installed)
+app.json = FastJSONProvider(app)
+# per-endpoint result cache budget (IPL_RESULT_CACHE_MB megabytes each)
+app.config["RESULT_CACHE_MAX_BYTES"] = int(
+    float(os.environ.get("IPL_RESULT_CACHE_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20
+)
+
+# the single shared, read-only copy every route module queries, with the
+# result caches computed from it; ingest and reload swap in new pairs, and
+# `ctx` always resolves to the one the current request started with
+with span("startup.data_context"):
+    handle = DataHandle(DataContext(matches, deliveries, DATA_VERSION), register_result_cache(app))
+ctx = handle.proxy
+
+# apply rows appended to the CSVs (checked every IPL_INGEST_POLL_SECONDS,
+# 0 = never) before the request is pinned to a context
+app.config["INGEST_POLL_SECONDS"] = float(
+    os.environ.get("IPL_INGEST_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+)
+register_ingest(app, handle, DATA_DIR, CSV_STATS)
+register_data_handle(app, handle)
+# full rebuilds in the background when the CSVs are replaced or on request
+register_reload(app, handle, DATA_DIR, USE_SNAPSHOT)
+# next, so its timer also covers requests the caches below answer early
+register_metrics(app, ctx)
+# ?_profile=1 / ?_profile=trace for requests with X-Admin-Token: IPL_ADMIN_TOKEN
+app.config["ADMIN_TOKEN"] = os.environ.get("IPL_ADMIN_TOKEN")
+register_profiling(app)
+# gzip/brotli for responses of IPL_COMPRESS_MIN_BYTES or more; before the
+# HTTP cache, which sets the ETag the compressed bodies are kept by
+app.config["COMPRESS_MIN_BYTES"] = int(os.environ.get("IPL_COMPRESS_MIN_BYTES", DEFAULT_MIN_BYTES))
+register_compression(app)
+# Cache-Control max-age for /api/* responses (IPL_CACHE_MAX_AGE seconds)
+app.config["API_CACHE_MAX_AGE"] = int(os.environ.get("IPL_CACHE_MAX_AGE", DEFAULT_MAX_AGE))
+register_http_cache(app, ctx)
+# pre-rendered responses from `python manage.py export`, when current
+# (IPL_STATIC_API=0 always computes live)
+if os.environ.get("IPL_STATIC_API", "1") != "0":
+    register_static_api(app, ctx, os.path.join(BASE, "frontend", "data", "api"))
 
 @app.context_processor
 def inject_now():
@@ -48,14 +109,6 @@ def compute_kpis(matches_df, deliveries_df):
         "unique_players": f"{unique_players:,}",
     }
 
-@lru_cache(maxsize=32)
-def _cached_top25(years: str = "all"):
-    df = compute_top25_players(deliveries, matches, years)
-    return [{"text": r.player, "size": round(r.avg_points, 1)} 
-            for r in df.itertuples(index=False)]
-
-_cached_top25("all")
-
 from top10 import register_routes as register_top10
 from teams import register_team_routes
 from individual import register_individual_routes
@@ -63,18 +116,22 @@ from win_prediction import register_routes as register_win_prediction
 from team_stats import register_team_stats_routes
 from wordcloud import register_wordcloud_routes
 from season_stats import register_routes as register_season_stats
-
-register_top10(app, matches, deliveries)
-register_team_routes(app, matches, deliveries)
-register_individual_routes(app, matches, deliveries)
-register_win_prediction(app, deliveries, matches)
-register_team_stats_routes(app, matches, deliveries)
-register_wordcloud_routes(app, matches, deliveries)
-register_season_stats(app, matches, deliveries)
+from leaderboard import register_leaderboard_routes
+from batch import register_batch_routes
+
+register_top10(app, ctx)
+register_team_routes(app, ctx)
+register_individual_routes(app, ctx)
+register_win_prediction(app, ctx)
+register_team_stats_routes(app, ctx)
+register_wordcloud_routes(app, ctx)
+register_season_stats(app, ctx)
+register_leaderboard_routes(app, ctx)
+register_batch_routes(app)
 
 @app.route("/")
 def home():
-    return render_template("home.html", **compute_kpis(matches, deliveries))
+    return render_template("home.html", **compute_kpis(ctx.matches, ctx.deliveries))
 
 @app.route("/ipldata")
 def ipldata():
@@ -100,13 +157,5 @@ def contests():
 def winprediction():
     return render_template("winprediction.html")
 
-@app.route("/api/wordcloud")
-def api_wordcloud():
-    years = request.args.get("years", "all")
-    try:
-        return jsonify(_cached_top25(years))
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
-
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,127 @@
+# batch.py
+
+import json
+import sys
+from functools import partial
+
+from flask import g, jsonify, request
+from werkzeug.exceptions import HTTPException, NotFound
+
+from data_handle import STAGED, SUBREQUEST
+from datastore import canonical_years
+from http_cache import canonical_params
+
+# upper bound on sub-requests in one POST /api/batch
+MAX_BATCH_REQUESTS = 50
+
+# DataContext methods whose (season-filtered) results SharedViews keeps
+_VIEWS = ("matches_for", "deliveries_for", "ledger_for", "cube_for", "player_sums")
+
+
+class SharedViews:
+    """
+    Stands in for the DataContext during one batch: the season-filtered
+    views (matches_for, deliveries_for, ledger_for, cube_for) and the
+    leaderboards' player_sums are computed once per season set (and
+    team) and handed to every sub-request that asks again. Everything
+    else is the context's own. Routes treat these results as read-only,
+    as they already must for the "all" views, which are the live frames.
+    """
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+        self._memo = {}
+
+    def __getattr__(self, name):
+        if name in _VIEWS:
+            return partial(self._view, name)
+        return getattr(self._ctx, name)
+
+    def _view(self, name, years_param, *args):
+        key = (name, canonical_years(years_param), *args)
+        if key not in self._memo:
+            self._memo[key] = getattr(self._ctx, name)(years_param, *args)
+        return self._memo[key]
+
+
+def _entry(status: int, body: bytes, mimetype: str) -> bytes:
+    if mimetype != "application/json":
+        body = json.dumps(body.decode("utf-8", "replace")).encode()
+    return b'{"status": %d, "body": %s}' % (status, body or b"null")
+
+
+def _error(status: int, message: str) -> bytes:
+    return _entry(status, json.dumps({"error": message}).encode(), "application/json")
+
+
+def register_batch_routes(app):
+    """
+    POST /api/batch runs several GET /api/* requests in one round trip.
+    Body: {"requests": [{"route": "/api/points_table", "params": {"year": "2016"}}, ...]}
+    Returns {"results": [{"status": 200, "body": ...}, ...]} in request
+    order, each body exactly what the route alone would return.
+
+    Every sub-request runs through the app's normal hooks and result
+    cache, pinned to one context for the whole batch and to a SharedViews
+    over it, so sub-requests over the same seasons share their filtering.
+    Repeated sub-requests are answered once. Metrics and ingest polling
+    skip sub-requests (SUBREQUEST): the batch counts as one request.
+    """
+
+    @app.route("/api/batch", methods=["POST"])
+    def batch():
+        body = request.get_json(silent=True)
+        subs = body.get("requests") if isinstance(body, dict) else body
+        if not isinstance(subs, list) or not subs:
+            return jsonify({"error": "Provide a non-empty list of requests"}), 400
+        if len(subs) > MAX_BATCH_REQUESTS:
+            return jsonify({"error": f"At most {MAX_BATCH_REQUESTS} requests per batch"}), 400
+
+        # the context, caches and cache generation this request was pinned
+        # to (data_handle.py)
+        staged = (SharedViews(g.data_ctx), g.result_cache, g.get("cache_generation"))
+        adapter = app.url_map.bind("")
+        answered = {}
+        results = []
+        for n, sub in enumerate(subs):
+            if not isinstance(sub, dict) or not isinstance(sub.get("route"), str):
+                results.append(_error(400, f"Request {n} needs a route"))
+                continue
+            route = sub["route"].split("?", 1)[0]
+            params = sub.get("params") or {}
+            if not isinstance(params, dict):
+                results.append(_error(400, f"Request {n}: params must be an object"))
+                continue
+            params = {k: ",".join(map(str, v)) if isinstance(v, list) else str(v)
+                      for k, v in params.items()}
+            if not route.startswith("/api/") or route.startswith("/api/admin/"):
+                results.append(_error(400, f"Request {n}: {route} can't be batched"))
+                continue
+            try:
+                # anything else would fall through to the static file route
+                if adapter.match(route, method="GET")[0] == "static":
+                    raise NotFound()
+            except HTTPException as e:
+                results.append(_error(e.code, f"Request {n}: {e.name} {route}"))
+                continue
+
+            key = (route, canonical_params(params))
+            if key not in answered:
+                answered[key] = _run(route, params, staged)
+            results.append(answered[key])
+
+        payload = b'{"results": [' + b", ".join(results) + b"]}"
+        return app.response_class(payload, mimetype="application/json")
+
+    def _run(route: str, params: dict, staged) -> bytes:
+        # a fresh app context too, so flask.g isn't shared with the batch
+        with app.app_context(), app.test_request_context(
+                route, method="GET", query_string=params,
+                environ_overrides={STAGED: staged, SUBREQUEST: True}):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                app.log_exception(sys.exc_info())
+                return _error(500, "Internal server error")
+            response.direct_passthrough = False
+            return _entry(response.status_code, response.get_data(), response.mimetype)
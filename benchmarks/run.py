@@ -0,0 +1,271 @@
+# run.py
+
+"""
+Endpoint benchmarks on synthetic data.
+
+    python benchmarks/run.py                      # 1x, compare to baseline.json
+    python benchmarks/run.py --scales 1 10 100
+    python benchmarks/run.py --save-baseline      # record the current numbers
+
+Each scale runs in its own process: the synthetic CSVs are generated once
+into benchmarks/.data/ (cached by scale and seed), the app is imported
+against them with the static export and result cache switched off, and
+every /api/* route is driven through the Flask test client. Per endpoint
+it reports p50/p95 latency, throughput and peak RSS (the process
+high-water mark, reset before each endpoint where Linux allows it).
+Endpoints whose p50 regresses past --threshold x the baseline fail the run.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE = os.path.join(HERE, "baseline.json")
+
+# p50 changes below this many ms are noise, whatever the ratio
+NOISE_MS = 2.0
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+def cases(ctx):
+    """
+    (name, method, path, params or JSON body) for every /api/* route, with
+    parameters picked from the loaded data: all seasons, one season, a
+    contiguous span and a split set; the leading run-scorer and
+    wicket-taker; the two teams with the most matches.
+    """
+    seasons = ctx.seasons
+    mid = seasons[len(seasons) // 2]
+    year_sets = {
+        "all":    "all",
+        "one":    str(mid),
+        "span":   ",".join(map(str, seasons[:3])),
+        "split":  f"{seasons[0]},{seasons[-1]}",
+    }
+    totals = ctx.player_totals("all", ["runs", "wickets"])
+    batter = str(totals["runs"].idxmax())
+    bowler = str(totals["wickets"].idxmax())
+    teams = ctx.matches["team1"].astype(object).value_counts().index[:2].tolist()
+
+    squad1 = totals["runs"].nlargest(11).index.astype(str).tolist()
+    squad2 = totals["wickets"].nlargest(11).index.astype(str).tolist()
+    lineups = {"team1": ",".join(squad1), "team2": ",".join(squad2)}
+
+    out = []
+    for label, years in year_sets.items():
+        for route in ("top_batsmen", "top_bowlers", "top_fielders", "orange_cap",
+                      "purple_cap", "batsmen_scatter_data", "bowlers_scatter_data",
+                      "season_summary", "team_wins", "team_winners", "wordcloud"):
+            out.append((f"{route}[{label}]", "GET", f"/api/{route}", {"years": years}))
+        out += [
+            (f"individual[{label}]", "GET", "/api/individual", {"player": batter, "years": years}),
+            (f"batter_vs_bowler[{label}]", "GET", "/api/batter_vs_bowler",
+             {"playerA": batter, "playerB": bowler, "years": years}),
+            (f"player_vs_player[{label}]", "GET", "/api/player_vs_player",
+             {"playerA": batter, "playerB": bowler, "years": years}),
+            (f"team_stats[{label}]", "GET", "/api/team_stats", {"team": teams[0], "years": years}),
+            (f"team_stats_compare[{label}]", "GET", "/api/team_stats_compare",
+             {"teamA": teams[0], "teamB": teams[1], "years": years}),
+            (f"team_vs_team[{label}]", "GET", "/api/team_vs_team",
+             {"teamA": teams[0], "teamB": teams[1], "years": years}),
+            (f"team_overview[{label}]", "GET", "/api/team_overview", {"team": teams[0], "years": years}),
+            (f"win_prediction[{label}]", "GET", "/api/win_prediction", {**lineups, "years": years}),
+        ]
+        # what the team stats page and (for the seasons its selector
+        # offers: all or one) the points table page send through /api/batch
+        subs = [{"route": route, "params": {"team": teams[0], "years": years}}
+                for route in ("/api/team_stats", "/api/team_overview")]
+        if label in ("all", "one"):
+            subs += [
+                {"route": "/api/points_table", "params": {"year": years}},
+                {"route": "/api/batsmen_scatter_data", "params": {"years": years}},
+                {"route": "/api/bowlers_scatter_data", "params": {"years": years}},
+            ]
+        out.append((f"batch[{label}]", "POST", "/api/batch", {"requests": subs}))
+        for metric in ("runs", "economy", "points"):
+            out.append((f"leaderboard_{metric}[{label}]", "GET", "/api/leaderboard",
+                        {"metric": metric, "years": years}))
+    out += [
+        ("points_table[one]", "GET", "/api/points_table", {"year": str(mid)}),
+        ("points_table[all]", "GET", "/api/points_table", {"year": "all"}),
+        ("win_prediction_simulate[100k]", "GET", "/api/win_prediction",
+         {**lineups, "mode": "simulate", "sims": "100000", "seed": "1"}),
+        ("win_prediction_batch[200]", "POST", "/api/win_prediction/batch",
+         {"jobs": [{"team1": squad1, "team2": squad2[i % 11:] + squad2[:i % 11],
+                    "years": years} for i, years in
+                   zip(range(200), list(year_sets.values()) * 50)]}),
+        ("leaderboard_runs[default]", "GET", "/api/leaderboard", {"metric": "runs"}),
+        ("leaderboard_avg_points[default]", "GET", "/api/leaderboard", {"metric": "avg_points"}),
+        ("leaderboard_wickets[team]", "GET", "/api/leaderboard",
+         {"metric": "wickets", "team": teams[0], "k": "25"}),
+        ("players_suggest", "GET", "/api/players/suggest", {"q": batter[:3]}),
+    ]
+    return out
+
+
+def run_worker(scale: float, seed: int, repeat: int, only: str | None) -> dict:
+    """Benchmark one scale in this process (see module docstring)."""
+    from synth import write_dataset
+
+    data_dir = os.path.join(HERE, ".data", f"scale-{scale:g}-seed-{seed}")
+    if not os.path.exists(os.path.join(data_dir, "deliveries.csv")):
+        start = time.perf_counter()
+        write_dataset(data_dir, scale, seed)
+        print(f"generated {data_dir} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    os.environ.update({
+        "IPL_DATA_DIR":        data_dir,
+        "IPL_STATIC_API":      "0",
+        "IPL_RESULT_CACHE_MB": "0",
+    })
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    import app as app_module
+    boot_s = time.perf_counter() - start
+
+    client = app_module.app.test_client()
+    ctx = app_module.ctx
+    results = {}
+    for name, method, path, payload in cases(ctx):
+        if only and only not in name:
+            continue
+
+        def call():
+            if method == "POST":
+                return client.post(path, json=payload)
+            return client.get(path, query_string=payload)
+
+        status = call().status_code
+        _reset_peak_rss()
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - t)
+        times.sort()
+        results[name] = {
+            "status":      status,
+            "p50_ms":      round(times[len(times) // 2] * 1e3, 3),
+            "p95_ms":      round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1e3, 3),
+            "rps":         round(len(times) / sum(times), 1),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+
+    return {
+        "scale":       scale,
+        "deliveries":  len(ctx.deliveries),
+        "matches":     len(ctx.matches),
+        "boot_s":      round(boot_s, 2),
+        "endpoints":   results,
+    }
+
+
+def compare(result: dict, baseline: dict | None, threshold: float) -> list:
+    """Print one scale's table; return the names of regressed endpoints."""
+    print(f"\nscale {result['scale']:g}: {result['deliveries']:,} deliveries, "
+          f"{result['matches']:,} matches, boot {result['boot_s']}s")
+    print(f"{'endpoint':40} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>9} {'rss MB':>8} {'vs base':>8}")
+    regressed = []
+    base = (baseline or {}).get("endpoints", {})
+    for name, r in result["endpoints"].items():
+        ratio = ""
+        b = base.get(name)
+        if b:
+            ratio = f"{r['p50_ms'] / b['p50_ms']:.2f}x" if b["p50_ms"] else ""
+            if r["p50_ms"] > b["p50_ms"] * threshold and r["p50_ms"] - b["p50_ms"] > NOISE_MS:
+                regressed.append(name)
+                ratio += " !"
+        flag = "" if r["status"] == 200 else f" [{r['status']}]"
+        print(f"{name + flag:40} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['rps']:9.1f} {r['peak_rss_mb']:8.1f} {ratio:>8}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per endpoint")
+    parser.add_argument("--only", help="only endpoints whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="p50 ratio over the baseline that counts as a regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_worker(args.scales[0], args.seed, args.repeat, args.only)
+        with open(args.out, "w") as fh:
+            json.dump(result, fh)
+        return 0
+
+    try:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    except (OSError, ValueError):
+        baseline = {}
+
+    results, regressed = {}, []
+    for scale in args.scales:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            out = tmp.name
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--out", out,
+               "--scales", str(scale), "--seed", str(args.seed), "--repeat", str(args.repeat)]
+        if args.only:
+            cmd += ["--only", args.only]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=HERE)
+        with open(out) as fh:
+            result = json.load(fh)
+        os.unlink(out)
+
+        key = f"{scale:g}"
+        results[key] = result
+        regressed += [f"{key}x {name}" for name in
+                      compare(result, None if args.save_baseline else baseline.get(key),
+                              args.threshold)]
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=1, sort_keys=True)
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    if regressed:
+        print(f"\n{len(regressed)} regression(s) over {args.threshold}x baseline p50:")
+        for name in regressed:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
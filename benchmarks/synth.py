@@ -0,0 +1,210 @@
+# synth.py
+
+"""
+Seeded synthetic IPL data in the shape of the Kaggle/Cricsheet CSVs the app
+reads (matches.csv, deliveries.csv), at a configurable scale.
+
+scale=1 is roughly one real IPL history: 17 seasons of 56 league matches
+plus 4 playoffs, 10 teams, ~270k deliveries. `scale` multiplies the
+matches per season (and so the deliveries); seasons, teams and squads stay
+fixed, so per-player histories get longer as the scale grows. The CSVs are
+written one season at a time to keep memory flat at 100x.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+SEASONS = range(2008, 2025)
+LEAGUE_PER_SEASON = 56
+PLAYOFFS = ("Qualifier 1", "Eliminator", "Qualifier 2", "Final")
+
+TEAMS = (
+    ("Chennai Super Kings", "Chennai", "MA Chidambaram Stadium"),
+    ("Delhi Capitals", "Delhi", "Arun Jaitley Stadium"),
+    ("Gujarat Titans", "Ahmedabad", "Narendra Modi Stadium"),
+    ("Kolkata Knight Riders", "Kolkata", "Eden Gardens"),
+    ("Lucknow Super Giants", "Lucknow", "Ekana Cricket Stadium"),
+    ("Mumbai Indians", "Mumbai", "Wankhede Stadium"),
+    ("Punjab Kings", "Mohali", "Punjab Cricket Association Stadium"),
+    ("Rajasthan Royals", "Jaipur", "Sawai Mansingh Stadium"),
+    ("Royal Challengers Bengaluru", "Bangalore", "M Chinnaswamy Stadium"),
+    ("Sunrisers Hyderabad", "Hyderabad", "Rajiv Gandhi International Stadium"),
+)
+SQUAD = 16
+UMPIRES = [f"Umpire {i}" for i in range(24)]
+
+# candidate deliveries generated per innings; innings stop at 120 legal
+# balls, 10 wickets or (second innings) once the target is reached
+ROWS_PER_INNINGS = 132
+RUNS = np.array([0, 1, 2, 3, 4, 6])
+RUN_P = np.array([0.38, 0.35, 0.07, 0.01, 0.13, 0.06])
+EXTRAS = np.array([None, "wides", "noballs", "legbyes", "byes"], dtype=object)
+EXTRA_P = np.array([0.93, 0.03, 0.01, 0.02, 0.01])
+KINDS = np.array(["caught", "bowled", "lbw", "run out", "stumped",
+                  "caught and bowled", "hit wicket"], dtype=object)
+KIND_P = np.array([0.6, 0.17, 0.1, 0.07, 0.03, 0.02, 0.01])
+WICKET_P = 0.05
+
+DELIVERY_COLUMNS = [
+    "match_id", "inning", "batting_team", "bowling_team", "over", "ball",
+    "batter", "bowler", "non_striker", "batsman_runs", "extra_runs",
+    "total_runs", "extras_type", "is_wicket", "player_dismissed",
+    "dismissal_kind", "fielder",
+]
+MATCH_COLUMNS = [
+    "id", "season", "city", "date", "match_type", "player_of_match", "venue",
+    "team1", "team2", "toss_winner", "toss_decision", "winner", "result",
+    "result_margin", "target_runs", "target_overs", "super_over", "method",
+    "umpire1", "umpire2",
+]
+
+
+def player_names() -> np.ndarray:
+    """SQUAD names per team, team-major: "<initial> <city><n>"."""
+    return np.array([
+        f"{chr(65 + i % 26)} {city}{i}"
+        for _, city, _ in TEAMS for i in range(SQUAD)
+    ], dtype=object)
+
+
+def _season(rng, year: int, n_league: int, first_id: int, names: np.ndarray):
+    n = n_league + len(PLAYOFFS)
+    n_teams = len(TEAMS)
+
+    # 1) fixtures; team1 bats first
+    t1 = rng.integers(0, n_teams, n)
+    t2 = (t1 + rng.integers(1, n_teams, n)) % n_teams
+    # each side's XI (squad slots), batting order = XI order; the last five
+    # of the XI bowl, rotating by over
+    xi = rng.permuted(np.tile(np.arange(SQUAD), (n, 2, 1)), axis=2)[:, :, :11]
+
+    # 2) candidate balls, [innings, row]; innings 2k is match k batting first
+    shape = (2 * n, ROWS_PER_INNINGS)
+    extras = EXTRAS[rng.choice(len(EXTRAS), shape, p=EXTRA_P)]
+    legal = (extras != "wides") & (extras != "noballs")
+    bat_runs = RUNS[rng.choice(len(RUNS), shape, p=RUN_P)]
+    bat_runs[(extras == "wides") | (extras == "legbyes") | (extras == "byes")] = 0
+    extra_runs = (extras != None).astype(np.int64)  # noqa: E711
+    wicket = (extras == None) & (rng.random(shape) < WICKET_P)  # noqa: E711
+    bat_runs[wicket] = 0
+    total = bat_runs + extra_runs
+
+    legal_before = np.cumsum(legal, axis=1) - legal
+    wk_before = np.cumsum(wicket, axis=1) - wicket
+    keep = (legal_before < 120) & (wk_before < 10)
+
+    # second innings stops once the target is passed
+    first = np.where(keep[0::2], total[0::2], 0).sum(axis=1)
+    target = first + 1
+    chase = np.cumsum(total[1::2], axis=1) - total[1::2]
+    keep[1::2] &= chase < target[:, None]
+
+    # 3) result per match
+    second = np.where(keep[1::2], total[1::2], 0).sum(axis=1)
+    wk2 = np.where(keep[1::2], wicket[1::2], False).sum(axis=1)
+    chased = second >= target
+    tied = second == first
+    winner = np.where(chased, t2, t1)
+    winner = np.where(tied, np.where(rng.random(n) < 0.5, t1, t2), winner)
+    result = np.where(chased, "wickets", np.where(tied, "tie", "runs"))
+    margin = np.where(chased, 10 - wk2, np.where(tied, np.nan, first - second)).astype(float)
+
+    # 4) flatten the kept balls
+    inn, row = np.nonzero(keep)
+    match = inn // 2
+    second_innings = inn % 2 == 1
+    bat_team = np.where(second_innings, t2[match], t1[match])
+    bowl_team = np.where(second_innings, t1[match], t2[match])
+    bat_xi = xi[match, second_innings.astype(int)]
+    bowl_xi = xi[match, 1 - second_innings.astype(int)]
+
+    over = legal_before[inn, row] // 6
+    key = inn.astype(np.int64) * 64 + over
+    _, start, inverse = np.unique(key, return_index=True, return_inverse=True)
+    ball = np.arange(len(key)) - start[inverse] + 1
+
+    k = np.arange(len(inn))
+    wk = wk_before[inn, row]
+    striker = bat_xi[k, np.minimum(wk, 10)]
+    partner = bat_xi[k, np.minimum(wk + 1, 10)]
+    bowler = bowl_xi[k, 6 + over % 5]
+    is_wkt = wicket[inn, row]
+    kinds = np.where(is_wkt, KINDS[rng.choice(len(KINDS), len(k), p=KIND_P)], None)
+    has_fielder = np.isin(kinds, ["caught", "run out", "stumped"])
+    fielder = bowl_xi[k, rng.integers(0, 11, len(k))]
+
+    def name(team, slot):
+        return names[team * SQUAD + slot]
+
+    team_names = np.array([t for t, _, _ in TEAMS], dtype=object)
+    match_ids = first_id + np.arange(n)
+    deliveries = pd.DataFrame({
+        "match_id":         match_ids[match],
+        "inning":           second_innings.astype(int) + 1,
+        "batting_team":     team_names[bat_team],
+        "bowling_team":     team_names[bowl_team],
+        "over":             over,
+        "ball":             ball,
+        "batter":           name(bat_team, striker),
+        "bowler":           name(bowl_team, bowler),
+        "non_striker":      name(bat_team, partner),
+        "batsman_runs":     bat_runs[inn, row],
+        "extra_runs":       extra_runs[inn, row],
+        "total_runs":       total[inn, row],
+        "extras_type":      extras[inn, row],
+        "is_wicket":        is_wkt.astype(int),
+        "player_dismissed": np.where(is_wkt, name(bat_team, striker), None),
+        "dismissal_kind":   kinds,
+        "fielder":          np.where(has_fielder, name(bowl_team, fielder), None),
+    })
+
+    home = np.array([c for _, c, _ in TEAMS], dtype=object)
+    venue = np.array([v for _, _, v in TEAMS], dtype=object)
+    day = np.arange(n) * 60 // n
+    potm_slot = xi[np.arange(n), np.where(winner == t1, 0, 1), rng.integers(0, 11, n)]
+    toss = np.where(rng.random(n) < 0.5, t1, t2)
+    matches = pd.DataFrame({
+        "id":              match_ids,
+        "season":          str(year),
+        "city":            home[t1],
+        "date":            (pd.Timestamp(f"{year}-03-25") + pd.to_timedelta(day, "D")).strftime("%Y-%m-%d"),
+        "match_type":      np.array(["League"] * n_league + list(PLAYOFFS), dtype=object),
+        "player_of_match": name(winner, potm_slot),
+        "venue":           venue[t1],
+        "team1":           team_names[t1],
+        "team2":           team_names[t2],
+        "toss_winner":     team_names[toss],
+        "toss_decision":   np.where(toss == t1, "bat", "field"),
+        "winner":          team_names[winner],
+        "result":          result,
+        "result_margin":   margin,
+        "target_runs":     target.astype(float),
+        "target_overs":    20.0,
+        "super_over":      np.where(tied, "Y", "N"),
+        "method":          np.nan,
+        "umpire1":         np.array(UMPIRES, dtype=object)[rng.integers(0, 12, n)],
+        "umpire2":         np.array(UMPIRES, dtype=object)[rng.integers(12, 24, n)],
+    })
+    return matches[MATCH_COLUMNS], deliveries[DELIVERY_COLUMNS]
+
+
+def write_dataset(out_dir: str, scale: float = 1.0, seed: int = 0):
+    """
+    Write matches.csv and deliveries.csv for `scale` into `out_dir`,
+    season by season. The same (scale, seed) always gives the same files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    names = player_names()
+    n_league = max(1, round(LEAGUE_PER_SEASON * scale))
+    paths = {f: os.path.join(out_dir, f"{f}.csv.tmp") for f in ("matches", "deliveries")}
+    first_id = 100000
+    for i, year in enumerate(SEASONS):
+        matches, deliveries = _season(rng, year, n_league, first_id, names)
+        first_id += len(matches)
+        matches.to_csv(paths["matches"], mode="a" if i else "w", header=not i, index=False)
+        deliveries.to_csv(paths["deliveries"], mode="a" if i else "w", header=not i, index=False)
+    for f, tmp in paths.items():
+        os.replace(tmp, os.path.join(out_dir, f"{f}.csv"))
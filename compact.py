@@ -0,0 +1,117 @@
+# compact.py
+
+import pandas as pd
+
+# Shared dictionaries: every column listed under a dimension gets the same
+# CategoricalDtype, so e.g. deliveries["batter"] and deliveries["fielder"]
+# use identical integer codes for the same player and compare as integers.
+DIMENSIONS = {
+    "player": {
+        "deliveries": ["batter", "bowler", "non_striker", "player_dismissed", "fielder"],
+        "matches":    ["player_of_match"],
+    },
+    "team": {
+        "deliveries": ["batting_team", "bowling_team"],
+        "matches":    ["team1", "team2", "toss_winner", "winner"],
+    },
+    "venue": {
+        "matches":    ["venue", "city"],
+    },
+    "dismissal": {
+        "deliveries": ["dismissal_kind"],
+    },
+    "extras": {
+        "deliveries": ["extras_type"],
+    },
+}
+
+
+def _present(frames: dict, dim: str):
+    for frame, cols in DIMENSIONS[dim].items():
+        for col in cols:
+            if frame in frames and col in frames[frame].columns:
+                yield frame, col
+
+
+def build_dtypes(frames: dict) -> dict:
+    """One sorted CategoricalDtype per dimension, built from every column it covers."""
+    dtypes = {}
+    for dim in DIMENSIONS:
+        values = set()
+        for frame, col in _present(frames, dim):
+            values.update(v for v in frames[frame][col].dropna().unique() if isinstance(v, str))
+        dtypes[dim] = pd.CategoricalDtype(sorted(values))
+    return dtypes
+
+
+def _downcast(s: pd.Series) -> pd.Series:
+    # integer columns only; float columns hold NaNs and stay as they are
+    if pd.api.types.is_integer_dtype(s) and not isinstance(s.dtype, pd.CategoricalDtype):
+        return pd.to_numeric(s, downcast="integer")
+    return s
+
+
+def compact_frames(matches: pd.DataFrame, deliveries: pd.DataFrame):
+    """
+    Return (matches, deliveries) with:
+      - player/team/venue/dismissal/extras columns dictionary-encoded as
+        shared categoricals (lookup table = dtype.categories)
+      - integer columns downcast to the smallest dtype that holds them
+        (int8 for runs/ball/over/inning, int32 for match ids)
+    """
+    frames = {"matches": matches.copy(), "deliveries": deliveries.copy()}
+    dtypes = build_dtypes(frames)
+    for dim, dtype in dtypes.items():
+        for frame, col in _present(frames, dim):
+            frames[frame][col] = frames[frame][col].astype(dtype)
+    for df in frames.values():
+        for col in df.columns:
+            df[col] = _downcast(df[col])
+    return frames["matches"], frames["deliveries"]
+
+
+def conform_frames(matches: pd.DataFrame, deliveries: pd.DataFrame,
+                   like_matches: pd.DataFrame, like_deliveries: pd.DataFrame):
+    """
+    compact_frames() for new rows that will join already compacted frames:
+    each dimension keeps the dtype it has in `like_*`, or, when the new rows
+    bring values it hasn't seen, gets a new dtype with them merged into the
+    sorted categories (so codes are what compact_frames would assign to
+    the combined data). Returns (matches, deliveries, changed), `changed`
+    mapping each replaced dtype to its successor; the old frames' columns
+    of those dtypes need recoding before they are combined with the new rows.
+    """
+    frames = {"matches": matches.copy(), "deliveries": deliveries.copy()}
+    like = {"matches": like_matches, "deliveries": like_deliveries}
+    fresh = build_dtypes(frames)
+    changed = {}
+    for dim in DIMENSIONS:
+        current = next((like[f][c].dtype for f, c in _present(like, dim)), None)
+        dtype = fresh[dim]
+        if current is not None:
+            extra = set(dtype.categories).difference(current.categories)
+            dtype = current
+            if extra:
+                dtype = pd.CategoricalDtype(sorted(set(current.categories) | extra))
+                changed[current] = dtype
+        for frame, col in _present(frames, dim):
+            frames[frame][col] = frames[frame][col].astype(dtype)
+    for df in frames.values():
+        for col in df.columns:
+            df[col] = _downcast(df[col])
+    return frames["matches"], frames["deliveries"], changed
+
+
+def memory_report(matches: pd.DataFrame, deliveries: pd.DataFrame) -> str:
+    """One line per frame with its row count, deep size and the largest columns."""
+    lines = []
+    for name, df in (("matches", matches), ("deliveries", deliveries)):
+        usage = df.memory_usage(index=False, deep=True)
+        biggest = ", ".join(
+            f"{col} {df[col].dtype}={usage[col] / 1024:.0f}KB"
+            for col in usage.nlargest(3).index
+        )
+        lines.append(
+            f"{name}: {len(df):,} rows, {usage.sum() / 1024 ** 2:.1f} MB ({biggest})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+# compression.py
+
+import gzip
+import time
+
+from flask import request
+
+from result_cache import ResultCache
+
+try:
+    import brotli
+except ImportError:     # optional: gzip only
+    brotli = None
+
+# responses smaller than this (bytes) are sent as they are
+DEFAULT_MIN_BYTES = 1024
+
+# memory budget for compressed bodies kept by ETag
+DEFAULT_CACHE_BYTES = 8 << 20
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE = (
+    "application/json", "application/javascript", "text/javascript",
+    "text/css", "text/html", "text/plain", "image/svg+xml",
+)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept) -> str:
+    """br or gzip, whichever the Accept-Encoding header prefers; None for neither."""
+    options = [("gzip", accept.quality("gzip"))]
+    if brotli is not None:
+        # on a tie brotli wins: smaller for the same CPU
+        options.insert(0, ("br", accept.quality("br")))
+    encoding, quality = max(options, key=lambda o: o[1])
+    return encoding if quality > 0 else None
+
+
+def register_compression(app):
+    """
+    Compress responses of COMPRESS_MIN_BYTES or more (JSON, the frontend's
+    JS/CSS/HTML) with brotli when installed and accepted, else gzip.
+    Responses with an ETag (every cacheable /api/* response, static files)
+    are compressed once: the result is kept by (ETag, encoding) in a
+    ResultCache of COMPRESSION_CACHE_BYTES, so cache hits don't pay for
+    it again. A compressed response's ETag is made weak, as the bytes
+    differ from the uncompressed ones; If-None-Match is compared weakly
+    (http_cache.py), so revalidation still answers 304.
+
+    Register this before register_http_cache, so the ETag is set when
+    this runs, and after register_metrics, so it counts the bytes sent.
+    """
+    app.config.setdefault("COMPRESS_MIN_BYTES", DEFAULT_MIN_BYTES)
+    app.config.setdefault("COMPRESSION_CACHE_BYTES", DEFAULT_CACHE_BYTES)
+    memo = ResultCache(app.config["COMPRESSION_CACHE_BYTES"], season_scoped=False)
+    app.extensions["compression"] = memo
+
+    @app.after_request
+    def compress(response):
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE
+                or "Content-Encoding" in response.headers
+                or "no-transform" in response.headers.get("Cache-Control", "")):
+            return response
+        # streamed bodies (the static files) report their length up front
+        size = response.content_length
+        if size is None:
+            if response.is_streamed:
+                return response
+            size = len(response.get_data())
+        if size < app.config["COMPRESS_MIN_BYTES"]:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding)
+        body = memo.get(key) if etag else None
+        if body is None:
+            start = time.perf_counter()
+            response.direct_passthrough = False
+            body = _compress(response.get_data(), encoding)
+            if etag:
+                memo.put(key, body, len(body), time.perf_counter() - start)
+        else:
+            # the uncompressed body (an open file, for static files) isn't sent
+            if hasattr(response.response, "close"):
+                response.response.close()
+
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        response.headers.pop("Accept-Ranges", None)
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
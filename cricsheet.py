@@ -0,0 +1,249 @@
+# cricsheet.py
+
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from compact import DIMENSIONS, _present, compact_frames
+
+# files per worker task; a task's rows are compacted before they're returned
+BATCH_FILES = 32
+
+# worker tasks in flight per process, which (with BATCH_FILES) bounds the
+# rows being parsed or waiting to be collected, whatever the archive size
+TASKS_PER_WORKER = 2
+
+MATCH_COLUMNS = [
+    "id", "season", "city", "date", "match_type", "player_of_match", "venue",
+    "team1", "team2", "toss_winner", "toss_decision", "winner", "result",
+    "result_margin", "target_runs", "target_overs", "super_over", "method",
+    "umpire1", "umpire2",
+]
+DELIVERY_COLUMNS = [
+    "match_id", "inning", "batting_team", "bowling_team", "over", "ball",
+    "batter", "bowler", "non_striker", "batsman_runs", "extra_runs",
+    "total_runs", "extras_type", "is_wicket", "player_dismissed",
+    "dismissal_kind", "fielder",
+]
+_INT_DELIVERY_COLUMNS = ["match_id", "inning", "over", "ball", "batsman_runs",
+                         "extra_runs", "total_runs", "is_wicket"]
+
+# franchise renames: Cricsheet keeps the name used at the time, the app
+# (like the Kaggle CSVs) uses the current one throughout
+TEAM_ALIASES = {
+    "Delhi Daredevils":            "Delhi Capitals",
+    "Kings XI Punjab":             "Punjab Kings",
+    "Rising Pune Supergiants":     "Rising Pune Supergiant",
+    "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
+}
+
+
+def source_files(source: str) -> list:
+    """
+    The per-match JSON files of a Cricsheet download, unzipped (a
+    directory) or not (a .zip), as paths or zip member names, ordered by
+    match id. Other files in it (README.txt) are ignored.
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            names = [n for n in zf.namelist() if n.endswith(".json")]
+    else:
+        names = [n for n in os.listdir(source) if n.endswith(".json")]
+
+    def match_id(name):
+        stem = os.path.basename(name)[:-len(".json")]
+        return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+    return sorted(names, key=match_id)
+
+
+def _team(name):
+    return TEAM_ALIASES.get(name, name)
+
+
+def parse_match(match_id: int, doc: dict):
+    """
+    One Cricsheet match (the parsed JSON) as (match row, delivery rows)
+    in the app's matches.csv / deliveries.csv schema; missing values are
+    None. Super overs are innings 3 and up, as in the CSVs.
+    """
+    info = doc["info"]
+    teams = [_team(t) for t in info["teams"]]
+    outcome = info.get("outcome", {})
+    by = outcome.get("by", {})
+    innings = doc.get("innings", [])
+    target = innings[1].get("target", {}) if len(innings) > 1 else {}
+    umpires = info.get("officials", {}).get("umpires", []) + [None, None]
+    toss = info.get("toss", {})
+
+    if "runs" in by or "wickets" in by:
+        result = "runs" if "runs" in by else "wickets"
+        margin = by[result]
+    else:
+        result, margin = outcome.get("result"), None
+
+    match = {
+        "id":              match_id,
+        "season":          str(info["season"]),
+        "city":            info.get("city"),
+        "date":            info["dates"][0],
+        "match_type":      info.get("event", {}).get("stage", "League"),
+        "player_of_match": (info.get("player_of_match") or [None])[0],
+        "venue":           info.get("venue"),
+        "team1":           teams[0],
+        "team2":           teams[1],
+        "toss_winner":     _team(toss.get("winner")),
+        "toss_decision":   toss.get("decision"),
+        # a tie's winner is whoever won the super over
+        "winner":          _team(outcome.get("winner", outcome.get("eliminator"))),
+        "result":          result,
+        "result_margin":   margin,
+        "target_runs":     target.get("runs"),
+        "target_overs":    target.get("overs"),
+        "super_over":      "Y" if any(inn.get("super_over") for inn in innings) else "N",
+        "method":          outcome.get("method"),
+        "umpire1":         umpires[0],
+        "umpire2":         umpires[1],
+    }
+
+    rows = []
+    for number, inn in enumerate(innings, 1):
+        batting = _team(inn["team"])
+        bowling = teams[1] if batting == teams[0] else teams[0]
+        for over in inn.get("overs", []):
+            for ball, d in enumerate(over["deliveries"], 1):
+                runs = d["runs"]
+                extras = d.get("extras") or {}
+                wicket = (d.get("wickets") or [{}])[0]
+                fielders = wicket.get("fielders") or [{}]
+                rows.append((
+                    match_id, number, batting, bowling, over["over"], ball,
+                    d["batter"], d["bowler"], d["non_striker"],
+                    runs["batter"], runs["extras"], runs["total"],
+                    next(iter(extras), None), 1 if wicket else 0,
+                    wicket.get("player_out"), wicket.get("kind"), fielders[0].get("name"),
+                ))
+    return match, rows
+
+
+def _parse_files(source: str, names: list):
+    """Parse `names` from `source` into (match rows, delivery rows)."""
+    matches, deliveries = [], []
+    archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+    try:
+        for name in names:
+            if archive is not None:
+                raw = archive.read(name)
+            else:
+                with open(os.path.join(source, name), "rb") as fh:
+                    raw = fh.read()
+            stem = os.path.basename(name)[:-len(".json")]
+            if not stem.isdigit():
+                raise ValueError(f"{name}: Cricsheet file names are <match id>.json")
+            match, rows = parse_match(int(stem), json.loads(raw))
+            matches.append(match)
+            deliveries.extend(rows)
+    finally:
+        if archive is not None:
+            archive.close()
+    return matches, deliveries
+
+
+def _frames(matches: list, deliveries: list):
+    """Rows from _parse_files as DataFrames typed like snapshot.read_csvs()."""
+    m = pd.DataFrame(matches, columns=MATCH_COLUMNS)
+    m["date"] = pd.to_datetime(m["date"])
+    for col in ("result_margin", "target_runs", "target_overs"):
+        m[col] = m[col].astype("float64")
+    d = pd.DataFrame(deliveries, columns=DELIVERY_COLUMNS)
+    d[_INT_DELIVERY_COLUMNS] = d[_INT_DELIVERY_COLUMNS].astype("int64")
+    return m, d
+
+
+def _load_batch(source: str, names: list):
+    """Worker task: `names` parsed and compacted (small to send back)."""
+    return compact_frames(*_frames(*_parse_files(source, names)))
+
+
+def iter_batches(source: str, workers: int = None):
+    """
+    Yield compacted (matches, deliveries) for successive BATCH_FILES-file
+    batches of `source`, parsed by a pool of `workers` processes (default:
+    one per CPU; 1 parses in this process). At most TASKS_PER_WORKER
+    batches per worker are in flight, so memory stays bounded by the batch
+    size, not the archive size. Each batch has its own categories.
+
+    Workers are forked while this is the only thread (startup); later
+    (a reload thread) they come from a fork server, which imports the
+    __main__ module, so that has to be import-safe (manage.py is).
+    """
+    names = source_files(source)
+    tasks = [names[i:i + BATCH_FILES] for i in range(0, len(names), BATCH_FILES)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        for task in tasks:
+            yield _load_batch(source, task)
+        return
+
+    if threading.active_count() == 1:
+        method = "fork"
+    elif "forkserver" in multiprocessing.get_all_start_methods():
+        method = "forkserver"
+    else:
+        method = "spawn"
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method)) as pool:
+        pending = deque()
+        todo = iter(tasks)
+        for task in todo:
+            pending.append(pool.submit(_load_batch, source, task))
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                break
+        while pending:
+            batch = pending.popleft().result()
+            task = next(todo, None)
+            if task is not None:
+                pending.append(pool.submit(_load_batch, source, task))
+            yield batch
+
+
+def _combine(matches: list, deliveries: list):
+    """
+    Concatenate compacted batches into what compact_frames would give for
+    all their rows: every dimension's categories become the sorted union
+    over the batches (and over both frames), and the codes are remapped to
+    it without going back through the strings.
+    """
+    batches = [{"matches": m, "deliveries": d} for m, d in zip(matches, deliveries)]
+    for dim in DIMENSIONS:
+        union = set()
+        for b in batches:
+            for frame, col in _present(b, dim):
+                union.update(b[frame][col].cat.categories)
+        categories = sorted(union)
+        for b in batches:
+            for frame, col in _present(b, dim):
+                b[frame][col] = b[frame][col].cat.set_categories(categories)
+    return (pd.concat([b["matches"] for b in batches], ignore_index=True),
+            pd.concat([b["deliveries"] for b in batches], ignore_index=True))
+
+
+def load_cricsheet(source: str, workers: int = None):
+    """
+    Compacted (matches, deliveries) for a Cricsheet download (see
+    iter_batches), equal to compact_frames() over the same matches parsed
+    from the Kaggle-style CSVs. The rows never exist as one uncompacted
+    frame, nor as CSV.
+    """
+    matches, deliveries = [], []
+    for m, d in iter_batches(source, workers):
+        matches.append(m)
+        deliveries.append(d)
+    if not matches:
+        raise ValueError(f"No Cricsheet match files in {source}")
+    return _combine(matches, deliveries)
@@ -0,0 +1,83 @@
+# data_handle.py
+
+import threading
+
+from flask import g, has_app_context, request
+from werkzeug.local import LocalProxy
+
+# WSGI environ key that pins an internal request (warm-up, batch
+# sub-requests) to a (ctx, caches) pair that isn't live yet, or to the
+# (ctx, caches, cache generation) its parent was pinned to; clients can't
+# set environ keys
+STAGED = "ipl.staged"
+
+# WSGI environ key set on the sub-requests of a POST /api/batch: hooks that
+# act once per client request (metrics, ingest polling) skip them
+SUBREQUEST = "ipl.subrequest"
+
+
+class DataHandle:
+    """
+    The live DataContext and the result caches computed from it,
+    replaceable as a pair while the app serves.
+
+    Route modules are registered with `handle.proxy` instead of a context:
+    inside a request it resolves to the context pinned when the request
+    started (see register_data_handle), elsewhere to the current one. A
+    swap therefore never mixes two datasets within one request, and
+    requests already running finish on the context they started with; the
+    old one is freed when the last of them ends.
+
+    `lock` serializes writers (ingest, reload); readers never take it.
+    """
+
+    def __init__(self, ctx, caches=None):
+        self.current = (ctx, caches)
+        self.lock = threading.Lock()
+        self.proxy = LocalProxy(self._resolve)
+
+    @property
+    def ctx(self):
+        return self.current[0]
+
+    @property
+    def caches(self):
+        return self.current[1]
+
+    def _resolve(self):
+        if has_app_context():
+            pinned = g.get("data_ctx")
+            if pinned is not None:
+                return pinned
+        return self.ctx
+
+    def swap(self, ctx, caches=None):
+        """
+        Make `ctx` (and `caches`, when given) current with one reference
+        assignment; returns the old context.
+        """
+        old = self.current
+        self.current = (ctx, old[1] if caches is None else caches)
+        return old[0]
+
+
+def register_data_handle(app, handle: DataHandle):
+    """
+    Pin each request to the context and caches current when it starts,
+    and to the caches' generation (result_cache.CacheRegistry), read
+    first: a swap made after that read shows as a newer generation.
+    """
+
+    @app.before_request
+    def pin_data():
+        staged = request.environ.get(STAGED)
+        if staged is not None and len(staged) == 3:
+            g.data_ctx, g.result_cache, g.cache_generation = staged
+            return
+        registry = (staged or handle.current)[1]
+        generation = registry.generation if registry is not None else None
+        g.data_ctx, g.result_cache = staged or handle.current
+        if g.result_cache is not registry:
+            # reload swapped in new caches meanwhile: don't trust either
+            generation = None
+        g.cache_generation = generation
@@ -0,0 +1,606 @@
+# datastore.py
+
+import numpy as np
+import pandas as pd
+
+from compact import conform_frames
+from player_names import PlayerNameIndex
+from pointValue import build_points_ledger
+from profiling import span
+
+# dismissal kinds credited to the bowler (run outs etc. excluded)
+WICKET_KINDS = {
+    "bowled", "caught", "lbw", "stumped",
+    "caught and bowled", "hit wicket"
+}
+
+# delivery columns covered by the per-player row index
+PLAYER_ROLES = ("batter", "bowler", "fielder")
+
+
+def parse_years(years_param) -> list | None:
+    """
+    Parse a ?years= value ("all" or "2009,2010") into a list of ints.
+    Returns None for "all" and for malformed input, which means "no filter".
+    """
+    if years_param is None:
+        return None
+    years_param = str(years_param).strip()
+    if years_param == "all":
+        return None
+    try:
+        return [int(y) for y in years_param.split(",")]
+    except ValueError:
+        return None
+
+
+def canonical_years(years_param) -> frozenset | None:
+    """
+    parse_years() as a frozenset, so "2010,2009", "2009, 2010" and
+    "2009,2010,2009" are one key. None means all seasons.
+    """
+    years = parse_years(years_param)
+    return None if years is None else frozenset(years)
+
+
+def years_label(years: frozenset | None) -> str:
+    """The ?years= spelling of a canonical_years() value."""
+    return "all" if years is None else ",".join(map(str, sorted(years)))
+
+
+def _partition(df: pd.DataFrame):
+    """
+    Stable-sort `df` by season and return (sorted_df, {season: (start, stop)}).
+    The copy is skipped when the frame is already in season order; `df`
+    must be a frame the caller owns, since its index is reset in place.
+    """
+    seasons = df["season"].to_numpy()
+    if len(seasons) and (np.diff(seasons) < 0).any():
+        order = np.argsort(seasons, kind="stable")
+        df = df.take(order)
+        seasons = seasons[order]
+    df.index = pd.RangeIndex(len(df))
+    keys = np.unique(seasons)
+    starts = np.searchsorted(seasons, keys, side="left")
+    stops = np.searchsorted(seasons, keys, side="right")
+    offsets = {int(k): (int(a), int(b)) for k, a, b in zip(keys, starts, stops)}
+    return df, offsets
+
+
+def _season_spans(offsets: dict, years: list) -> list:
+    """(start, stop) row blocks for `years`, with consecutive seasons merged."""
+    spans = []
+    for y in sorted(set(years)):
+        if y not in offsets:
+            continue
+        start, stop = offsets[y]
+        if spans and spans[-1][1] == start:
+            spans[-1][1] = stop
+        else:
+            spans.append([start, stop])
+    return spans
+
+
+def _slice_seasons(df: pd.DataFrame, offsets: dict, years: list) -> pd.DataFrame:
+    """
+    Rows of a season-partitioned frame for `years`. Consecutive seasons are
+    one contiguous block, so they come back as a zero-copy iloc slice; only
+    gaps (e.g. 2009,2012) need a concat of the separate blocks.
+    """
+    spans = _season_spans(offsets, years)
+    if not spans:
+        return df.iloc[0:0]
+    if len(spans) == 1:
+        return df.iloc[spans[0][0]:spans[0][1]]
+    return pd.concat([df.iloc[a:b] for a, b in spans])
+
+
+def _derive_columns(matches: pd.DataFrame, deliveries: pd.DataFrame):
+    """
+    Shallow copies of the frames with the built columns added (see
+    DataContext); existing column buffers are shared.
+    """
+    m = matches.copy(deep=False)
+    m["season"] = m["date"].dt.year.astype("int16")
+
+    d = deliveries.copy(deep=False)
+    pos = pd.Index(m["id"]).get_indexer(d["match_id"])
+    seasons = m["season"].to_numpy()
+    d["season"] = np.where(pos >= 0, seasons[pos], 0).astype("int16")
+    d["is_four"] = d["batsman_runs"] == 4
+    d["is_six"] = d["batsman_runs"] == 6
+    d["is_dot"] = d["total_runs"] == 0
+    d["bowler_wicket"] = d["dismissal_kind"].isin(WICKET_KINDS)
+    d["legal"] = ~d["extras_type"].isin(["wides", "noballs"])
+    return m, d
+
+
+def _innings(deliveries: pd.DataFrame) -> pd.DataFrame:
+    d = deliveries
+    return (
+        pd.DataFrame({
+            "match_id":     d["match_id"].to_numpy(),
+            "batting_team": d["batting_team"].array,
+            "runs":         d["batsman_runs"].to_numpy(),
+            "wickets":      d["bowler_wicket"].to_numpy(),
+            "balls":        np.ones(len(d), dtype=np.int64),
+        })
+        .groupby(["match_id", "batting_team"], observed=True)
+        .sum()
+    )
+
+
+def _recategorize(df: pd.DataFrame, changed: dict) -> pd.DataFrame:
+    """
+    `df` with its categorical columns moved to their successor dtypes in
+    `changed` (see compact.conform_frames); a shallow copy, or `df` itself
+    when nothing changed.
+    """
+    if not changed:
+        return df
+    out = df.copy(deep=False)
+    for col in df.columns:
+        dtype = changed.get(df[col].dtype) if isinstance(df[col].dtype, pd.CategoricalDtype) else None
+        if dtype is not None:
+            out[col] = df[col].astype(dtype)
+    return out
+
+
+def _append(block: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([block, new])
+
+
+def _sorted_by(*keys):
+    def merge(block, new):
+        return pd.concat([block, new]).sort_values(list(keys), kind="stable")
+    return merge
+
+
+def _summed(block: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    keys = ["player", "season", "team"]
+    merged = pd.concat([block, new]).groupby(keys, observed=True).sum().reset_index()
+    return merged.astype(block.dtypes.to_dict())
+
+
+def _merge_seasons(df: pd.DataFrame, offsets: dict, new: pd.DataFrame, merge):
+    """
+    Fold `new` rows into a season-partitioned frame: each touched season's
+    block becomes merge(old_block, new_rows_of_that_season), and runs of
+    untouched seasons are carried over as single slices. Returns (frame,
+    offsets) like _partition.
+    """
+    seasons = new["season"].to_numpy()
+    touched = set(int(y) for y in np.unique(seasons))
+    blocks, out = [], {}
+    row = kept = last = 0   # kept: start of the pending run of untouched rows
+    for season in sorted(set(offsets) | touched):
+        # a new season goes right after the last existing one before it
+        start, stop = offsets.get(season, (last, last))
+        last = stop
+        if season in touched:
+            blocks.append(df.iloc[kept:start])
+            block = merge(df.iloc[start:stop], new[seasons == season])
+            blocks.append(block)
+            kept = stop
+            size = len(block)
+        else:
+            size = stop - start
+        out[season] = (row, row + size)
+        row += size
+    blocks.append(df.iloc[kept:])
+    return pd.concat(blocks, ignore_index=True), out
+
+
+def _extend_inverted_index(index, remap, new_codes: np.ndarray, start: int, n: int):
+    """
+    An _inverted_index() with rows start, start + 1, ... (codes `new_codes`)
+    added after all existing rows. `remap` maps old codes to new ones when
+    categories were inserted (None if unchanged); it's monotonic, so the
+    existing order stays sorted and only the bounds move.
+    """
+    order, bounds = index
+    counts = np.zeros(n, dtype=np.int64)
+    old_counts = np.diff(bounds)
+    if remap is None:
+        counts[:len(old_counts)] = old_counts
+    else:
+        counts[remap] = old_counts
+    # block boundaries of the existing rows under the new codes; missing
+    # values (-1) still come first
+    begin = np.empty(n + 1, dtype=np.int64)
+    begin[0] = bounds[0]
+    begin[1:] = bounds[0] + np.cumsum(counts)
+
+    by_code = np.argsort(new_codes, kind="stable")
+    codes = new_codes[by_code]
+    # each new row goes to the end of its code's block (np.insert is stable)
+    order = np.insert(order, begin[codes + 1], (start + by_code).astype("int32"))
+    bounds = begin + np.searchsorted(codes, np.arange(n + 1), side="left")
+    return order, bounds
+
+
+def _inverted_index(codes: np.ndarray, n: int):
+    """
+    Group row positions by category code: rows for code c are
+    order[bounds[c]:bounds[c + 1]], in ascending row (hence season) order.
+    Missing values (code -1) sort first and are never looked up.
+    """
+    order = np.argsort(codes, kind="stable").astype("int32")
+    bounds = np.searchsorted(codes[order], np.arange(n + 1), side="left")
+    return order, bounds
+
+
+# additive per-(player, season, team) stats kept in DataContext.cube
+CUBE_COLUMNS = (
+    "runs", "balls", "fours", "sixes",
+    "wickets", "runs_conceded", "bowl_balls", "legal_balls", "dots",
+    "catches", "run_outs",
+)
+
+
+def build_player_cube(deliveries: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (player, season, team) with the CUBE_COLUMNS totals:
+      - batting (as batter, for the batting team): runs, balls, fours, sixes
+      - bowling (as bowler, for the bowling team): wickets (credited to the
+        bowler), runs_conceded (total_runs), bowl_balls (every delivery),
+        legal_balls, dots
+      - fielding (as fielder, for the bowling team): catches, run_outs
+    Everything is additive, so any set of seasons (or teams) is a sum over
+    rows. Rows are in (player, season, team) order; `player` and `team`
+    keep the deliveries' categorical dtypes, so grouping the cube by player
+    gives the same order as grouping the deliveries.
+    """
+    d = deliveries
+    keys = ["player", "season", "team"]
+    season = d["season"].to_numpy()
+    ball = d["ball"].notna().to_numpy()
+    kind = d["dismissal_kind"]
+
+    def per_role(role, team, **cols):
+        frame = pd.DataFrame({"player": d[role].array, "season": season,
+                              "team": d[team].array, **cols})
+        return frame.groupby(keys, observed=True).sum()
+
+    cube = pd.concat([
+        per_role("batter", "batting_team",
+                 runs=d["batsman_runs"].to_numpy(), balls=ball,
+                 fours=d["is_four"].to_numpy(), sixes=d["is_six"].to_numpy()),
+        per_role("bowler", "bowling_team",
+                 wickets=d["bowler_wicket"].to_numpy(),
+                 runs_conceded=d["total_runs"].to_numpy(), bowl_balls=ball,
+                 legal_balls=d["legal"].to_numpy(), dots=d["is_dot"].to_numpy()),
+        per_role("fielder", "bowling_team",
+                 catches=(kind == "caught").to_numpy(),
+                 run_outs=(kind == "run out").to_numpy()),
+    ], axis=1, sort=True).fillna(0).astype("int32").reset_index()
+
+    cube["player"] = cube["player"].astype(d["batter"].dtype)
+    cube["season"] = cube["season"].astype("int16")
+    cube["team"] = cube["team"].astype(d["batting_team"].dtype)
+    return cube[["player", "season", "team", *CUBE_COLUMNS]]
+
+
+def build_points_tables(matches: pd.DataFrame, innings: pd.DataFrame) -> dict:
+    """
+    League table for every season in `matches`: { season: [row, ...] },
+    rows sorted by (points, nrr) descending. Runs and overs come from
+    `innings` (DataContext.innings), and every match is scored at once with
+    array operations:
+      - team1 always scores target - 1 in its allotted overs
+      - team2's runs are its innings total; its overs are the allotment when
+        it lost by runs or was bowled out, else balls / 6
+      - result "runs" means team1 won, anything else team2 (winner set)
+    """
+    m = matches
+    league = m[m["match_type"].str.lower() == "league"]
+
+    t1 = league["team1"].cat.codes.to_numpy()
+    t2 = league["team2"].cat.codes.to_numpy()
+    target = league["target_runs"].to_numpy("float64")
+    o_alloc = league["target_overs"].to_numpy("float64")
+    by_runs = (league["result"].str.lower() == "runs").to_numpy()
+    decided = league["winner"].notna().to_numpy()
+    seasons = league["season"].to_numpy()
+
+    # 1) team2's innings, looked up by (match_id, team2)
+    with span("points_table.innings_lookup", matches=len(league)):
+        pos = innings.index.get_indexer(pd.MultiIndex.from_arrays(
+            [league["id"].to_numpy(), league["team2"].astype(object)]
+        ))
+    found = pos >= 0
+    pos = np.where(found, pos, 0)
+    r2 = np.where(found, innings["runs"].to_numpy()[pos], 0).astype("float64")
+    wk2 = np.where(found, innings["wickets"].to_numpy()[pos], 0)
+    balls2 = np.where(found, innings["balls"].to_numpy()[pos], 0)
+
+    # 2) runs and overs per side
+    r1 = target - 1
+    o1 = o_alloc
+    o2 = np.where(by_runs | (wk2 >= 10), o_alloc, balls2 / 6)
+    winner = np.where(by_runs, t1, t2)
+    loser = np.where(by_runs, t2, t1)
+
+    names = league["team1"].cat.categories
+    n = len(names)
+    tables = {}
+    for season in np.unique(seasons):
+        with span("points_table.season", season=int(season)):
+            s = seasons == season
+            # (team1, team2) interleaved, so each team's sums accumulate in
+            # match order
+            sides = np.column_stack([t1[s], t2[s]]).ravel()
+
+            def per_team(a, b):
+                out = np.zeros(n)
+                np.add.at(out, sides, np.column_stack([a[s], b[s]]).ravel())
+                return out
+
+            played = np.bincount(sides, minlength=n)
+            wins = np.bincount(winner[s & decided], minlength=n)
+            losses = np.bincount(loser[s & decided], minlength=n)
+            runs_scored = per_team(r1, r2)
+            runs_conceded = per_team(r2, r1)
+            overs_faced = per_team(o1, o2)
+            overs_bowled = per_team(o2, o1)
+
+            # equalize matches and compute no_result
+            max_mp = played.max()
+            stats = []
+            for t in sorted(set(league.loc[s, "team1"]).union(league.loc[s, "team2"])):
+                c = names.get_loc(t)
+                nr = int(max_mp - played[c])
+                if overs_faced[c] and overs_bowled[c]:
+                    nrr = round((runs_scored[c] / overs_faced[c]) -
+                                (runs_conceded[c] / overs_bowled[c]), 3)
+                else:
+                    nrr = 0.0
+                stats.append({
+                    "team":           t,
+                    "matches_played": int(max_mp),
+                    "wins":           int(wins[c]),
+                    "losses":         int(losses[c]),
+                    "no_result":      nr,
+                    "points":         int(wins[c]) * 2 + nr,
+                    "nrr":            float(nrr)
+                })
+
+            # sort & output: points, then NRR (NaN last), then team name
+            tables[int(season)] = sorted(
+                stats,
+                key=lambda x: (-x["points"],
+                               -x["nrr"] if x["nrr"] == x["nrr"] else np.inf,
+                               x["team"])
+            )
+    return tables
+
+
+class DataContext:
+    """
+    The one shared copy of the dataset, built once at startup.
+
+    `matches` and `deliveries` are treated as read-only by every route
+    module: never assign columns on them or on frames returned by the
+    helpers below, derive new frames instead. Built columns:
+      - matches["season"], deliveries["season"]: int16 year of the match
+      - deliveries["is_four"], ["is_six"], ["is_dot"]: batsman_runs / total_runs flags
+      - deliveries["bowler_wicket"]: dismissal credited to the bowler
+      - deliveries["legal"]: not a wide or no-ball
+
+    Both frames are sorted by season (stable, so the original order holds
+    within a season) with a RangeIndex; `match_offsets` and
+    `delivery_offsets` map each season to its (start, stop) row block.
+
+    `player_index` maps each role ("batter", "bowler", "fielder") to an
+    inverted index from player code to that player's row positions, so
+    per-player queries gather only the player's own deliveries.
+
+    `names` is the PlayerNameIndex used to resolve and suggest player names.
+
+    `ledger` holds fantasy points per (player, match), scored once here
+    (see pointValue.build_points_ledger) and season-partitioned like the
+    frames above; career averages, MVPs and win prediction reduce over it.
+
+    `cube` holds additive batting/bowling/fielding totals per (player,
+    season, team) (see build_player_cube), season-partitioned; leaderboards
+    sum it over the requested seasons instead of regrouping deliveries.
+
+    `innings` has runs (batsman_runs), bowler wickets and balls (all rows)
+    per (match_id, batting_team), from one grouped aggregation.
+    """
+
+    def __init__(self, matches: pd.DataFrame, deliveries: pd.DataFrame, version: str = ""):
+        self.version = version
+        m, d = _derive_columns(matches, deliveries)
+
+        self.matches, self.match_offsets = _partition(m)
+        self.deliveries, self.delivery_offsets = _partition(d)
+        self.seasons = sorted(self.match_offsets)
+
+        players = self.deliveries["batter"].cat.categories
+        self.player_index = {
+            role: _inverted_index(
+                self.deliveries[role].cat.codes.to_numpy(), len(players)
+            )
+            for role in PLAYER_ROLES
+        }
+        self.names = PlayerNameIndex(self.deliveries)
+        self.ledger, self.ledger_offsets = _partition(build_points_ledger(self.deliveries))
+        self.cube, self.cube_offsets = _partition(build_player_cube(self.deliveries))
+        self.innings = _innings(self.deliveries)
+        self.points_tables = build_points_tables(self.matches, self.innings)
+
+    def extend(self, matches: pd.DataFrame, deliveries: pd.DataFrame, version: str) -> "DataContext":
+        """
+        A new DataContext with `matches` (raw rows, as read from the CSV) and
+        their `deliveries` added. This one is left untouched, and the result
+        equals a fresh DataContext over the combined rows, but it's built
+        from the parts here that the new matches can't change:
+          - frames: new rows are appended to their season blocks; the other
+            blocks are copied over as they are
+          - player_index: new row positions are merged into the existing
+            index when they land at the end (the latest season or a new
+            one), else it's rebuilt
+          - names: match counts of the new rows added to the current ones
+          - ledger, innings: scored for the new matches only
+          - cube, points_tables: redone for the touched seasons only
+        New players, teams etc. are merged into the sorted categories and
+        the existing columns recoded to match. Raises ValueError for match
+        ids that are already loaded and for deliveries of matches not in
+        `matches`.
+        """
+        dup = pd.Index(matches["id"]).intersection(self.matches["id"])
+        if len(dup):
+            raise ValueError(f"Matches already loaded: {', '.join(map(str, dup[:10]))}")
+        orphans = pd.Index(deliveries["match_id"]).difference(matches["id"])
+        if len(orphans):
+            raise ValueError(f"Deliveries for unknown matches: {', '.join(map(str, orphans[:10]))}")
+
+        with span("extend.conform", matches=len(matches), deliveries=len(deliveries)):
+            m_new, d_new, changed = conform_frames(matches, deliveries, self.matches, self.deliveries)
+            m_new, d_new = _derive_columns(m_new, d_new)
+            touched = sorted(int(y) for y in np.unique(m_new["season"]))
+            old_players = self.deliveries["batter"].cat.categories
+
+        ctx = DataContext.__new__(DataContext)
+        ctx.version = version
+
+        with span("extend.frames"):
+            ctx.matches, ctx.match_offsets = _merge_seasons(
+                _recategorize(self.matches, changed), self.match_offsets, m_new, _append)
+            ctx.deliveries, ctx.delivery_offsets = _merge_seasons(
+                _recategorize(self.deliveries, changed), self.delivery_offsets, d_new, _append)
+            ctx.seasons = sorted(ctx.match_offsets)
+
+        with span("extend.player_index"):
+            players = ctx.deliveries["batter"].cat.categories
+            start = len(self.deliveries)
+            if self.seasons and touched[0] >= self.seasons[-1]:
+                # old rows kept their positions; new ones are start onwards
+                remap = players.get_indexer(old_players) if len(players) != len(old_players) else None
+                ctx.player_index = {
+                    role: _extend_inverted_index(
+                        self.player_index[role], remap,
+                        ctx.deliveries[role].cat.codes.to_numpy()[start:], start, len(players)
+                    )
+                    for role in PLAYER_ROLES
+                }
+            else:
+                ctx.player_index = {
+                    role: _inverted_index(ctx.deliveries[role].cat.codes.to_numpy(), len(players))
+                    for role in PLAYER_ROLES
+                }
+
+        with span("extend.names"):
+            ctx.names = self.names.extended(d_new)
+
+        with span("extend.ledger"):
+            ctx.ledger, ctx.ledger_offsets = _merge_seasons(
+                _recategorize(self.ledger, changed), self.ledger_offsets,
+                build_points_ledger(d_new), _sorted_by("player", "match_id"))
+
+        with span("extend.cube"):
+            ctx.cube, ctx.cube_offsets = _merge_seasons(
+                _recategorize(self.cube, changed), self.cube_offsets,
+                build_player_cube(d_new), _summed)
+
+        with span("extend.innings"):
+            innings = pd.concat([_recategorize(self.innings.reset_index(), changed),
+                                 _innings(d_new).reset_index()], ignore_index=True)
+            innings = innings.set_index(["match_id", "batting_team"])
+            ctx.innings = innings if innings.index.is_monotonic_increasing else innings.sort_index()
+
+        with span("extend.points_tables", seasons=touched):
+            ctx.points_tables = {
+                **self.points_tables,
+                **build_points_tables(ctx.matches_for(",".join(map(str, touched))), ctx.innings),
+            }
+            ctx.points_tables = dict(sorted(ctx.points_tables.items()))
+        return ctx
+
+    def matches_for(self, years_param) -> pd.DataFrame:
+        """Matches in the requested seasons (the full frame for "all")."""
+        years = parse_years(years_param)
+        if years is None:
+            return self.matches
+        return _slice_seasons(self.matches, self.match_offsets, years)
+
+    def deliveries_for(self, years_param) -> pd.DataFrame:
+        """Deliveries in the requested seasons (the full frame for "all")."""
+        years = parse_years(years_param)
+        if years is None:
+            return self.deliveries
+        return _slice_seasons(self.deliveries, self.delivery_offsets, years)
+
+    def ledger_for(self, years_param) -> pd.DataFrame:
+        """Points-ledger rows in the requested seasons (all rows for "all")."""
+        years = parse_years(years_param)
+        if years is None:
+            return self.ledger
+        return _slice_seasons(self.ledger, self.ledger_offsets, years)
+
+    def cube_for(self, years_param) -> pd.DataFrame:
+        """Player-cube rows in the requested seasons (all rows for "all")."""
+        years = parse_years(years_param)
+        if years is None:
+            return self.cube
+        return _slice_seasons(self.cube, self.cube_offsets, years)
+
+    def player_totals(self, years_param, columns) -> pd.DataFrame:
+        """
+        Cube `columns` summed per player over the requested seasons,
+        indexed by player in category order (like a deliveries groupby).
+        """
+        cube = self.cube_for(years_param)
+        return cube.groupby("player", observed=True)[list(columns)].sum()
+
+    def player_sums(self, years_param, team: str = None) -> dict:
+        """
+        Every CUBE_COLUMNS column summed per player over the requested
+        seasons (with `team`, only what the player did for that team), as
+        int64 arrays indexed by player code: position i is category i of
+        deliveries["batter"], zero for players who didn't take part. One
+        bincount per column over the cube rows. Raises KeyError for an
+        unknown team.
+        """
+        cube = self.cube_for(years_param)
+        codes = cube["player"].cat.codes.to_numpy()
+        n = len(cube["player"].cat.categories)
+        rows = slice(None)
+        if team is not None:
+            team_code = cube["team"].cat.categories.get_loc(team)
+            rows = cube["team"].cat.codes.to_numpy() == team_code
+            codes = codes[rows]
+        return {
+            col: np.bincount(codes, weights=cube[col].to_numpy()[rows], minlength=n).astype(np.int64)
+            for col in CUBE_COLUMNS
+        }
+
+    def player_rows(self, player: str, role: str, years_param="all") -> np.ndarray:
+        """
+        Sorted row positions in `deliveries` where `player` appears as
+        `role`, restricted to the requested seasons. Cost is proportional
+        to the player's career, not to the table size.
+        """
+        order, bounds = self.player_index[role]
+        categories = self.deliveries[role].cat.categories
+        try:
+            code = categories.get_loc(player)
+        except KeyError:
+            return order[:0]
+        rows = order[bounds[code]:bounds[code + 1]]
+
+        years = parse_years(years_param)
+        if years is None:
+            return rows
+        # rows are ascending and the frame is season-sorted, so each season
+        # block is a contiguous run of `rows`
+        parts = [
+            rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]
+            for start, stop in _season_spans(self.delivery_offsets, years)
+        ]
+        return np.concatenate(parts) if parts else order[:0]
+
+    def player_deliveries(self, player: str, role: str, years_param="all") -> pd.DataFrame:
+        """The deliveries for `player_rows(...)`, gathered with one take()."""
+        return self.deliveries.take(self.player_rows(player, role, years_param))
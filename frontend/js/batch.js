@@ -0,0 +1,16 @@
+// frontend/js/batch.js
+
+/**
+ * Run several GET /api/* requests in one round trip (POST /api/batch).
+ * `requests` is a list of { route, params }; resolves to a list of
+ * { status, body } in the same order.
+ */
+export async function fetchBatch(requests) {
+  const resp = await fetch("/api/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ requests }),
+  });
+  if (!resp.ok) throw new Error(`batch request failed: ${resp.status}`);
+  return (await resp.json()).results;
+}
@@ -1,4 +1,6 @@
 //  frontend/js/pointsTable.js
+import { fetchBatch } from "./batch.js";
+
 export function drawPointsTable(
   containerSelector,
   apiEndpoint = "/api/points_table"
@@ -67,18 +69,14 @@ export function drawPointsTable(
     resultArea.html("<p>Loading…</p>");
 
     try {
-      /* 1 ) points table */
-      const ptsResp = await fetch(`${apiEndpoint}?year=${year}`);
-      const ptsText = await ptsResp.text();
-      const ptsTable = JSON.parse(ptsText.replace(/\bNaN\b/g, "null"));
-
-      /* 2 ) scatter-plot data (no more summary fetch) */
-      const [bats, bowl] = await Promise.all([
-        fetch(`/api/batsmen_scatter_data?years=${year}`).then((r) => r.json()),
-        fetch(`/api/bowlers_scatter_data?years=${year}`).then((r) => r.json()),
-      ]);
-
-      /* 3 ) render */
+      /* 1 ) points table + scatter-plot data, in one round trip */
+      const [ptsTable, bats, bowl] = (await fetchBatch([
+        { route: apiEndpoint, params: { year } },
+        { route: "/api/batsmen_scatter_data", params: { years: year } },
+        { route: "/api/bowlers_scatter_data", params: { years: year } },
+      ])).map((r) => r.body);
+
+      /* 2 ) render */
       resultArea.html("");
       renderTable(ptsTable);
       renderScatters(bats, bowl);
@@ -1,4 +1,5 @@
 // frontend/js/team_stats.js
+import { fetchBatch } from "./batch.js";
 
 export function drawTeamStats(containerSelector,
   statsEndpoint = "/api/team_stats",
@@ -172,15 +173,15 @@ export function drawTeamStats(containerSelector,
       .forEach(a => a.html("<p>Loading…</p>"));
 
     try {
-      const statsRes = await fetch(
-        `${statsEndpoint}?team=${encodeURIComponent(team)}&years=${yearsParam}`);
-      const statsData = await statsRes.json();
+      const [statsRes, ovRes] = await fetchBatch([
+        { route: statsEndpoint, params: { team, years: yearsParam } },
+        { route: overviewEndpoint, params: { team, years: yearsParam } },
+      ]);
+      const statsData = statsRes.body;
       if (statsData.error) throw new Error(statsData.error);
 
-      const ovRes = await fetch(
-        `${overviewEndpoint}?team=${encodeURIComponent(team)}&years=${yearsParam}`);
-      const ovData = ovRes.ok
-        ? await ovRes.json()
+      const ovData = ovRes.status === 200
+        ? ovRes.body
         : null;
 
       winlossArea.html("");
@@ -0,0 +1,88 @@
+# http_cache.py
+
+import hashlib
+
+from flask import g, request
+
+from datastore import canonical_years, years_label
+
+# default Cache-Control max-age (seconds) for /api/* GET responses
+DEFAULT_MAX_AGE = 300
+
+
+def canonical_params(args) -> str:
+    """
+    Query parameters in a canonical form: keys sorted, repeated values kept
+    in order, and ?years= normalised the way the routes read it ("all" for
+    all/malformed, else the sorted distinct seasons).
+    """
+    parts = []
+    for key in sorted(args):
+        # request.args (a MultiDict) or a plain {key: value} dict
+        values = args.getlist(key) if hasattr(args, "getlist") else [args[key]]
+        if key == "years":
+            values = [years_label(canonical_years(v)) for v in values]
+        parts.extend(f"{key}={v}" for v in values)
+    return "&".join(parts)
+
+
+def make_etag(path: str, params: str, version: str) -> str:
+    """Strong ETag for one (route, canonical params, data version)."""
+    h = hashlib.blake2b(digest_size=12)
+    for part in (path, params, version):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def no_store():
+    """
+    Mark the current response as not cacheable (e.g. unseeded random
+    output). Views call this; the response gets no ETag and
+    Cache-Control: no-store.
+    """
+    g.http_no_store = True
+
+
+def register_http_cache(app, ctx):
+    """
+    Conditional GET for every /api/* route. Every response for a given
+    (path, canonical params, ctx.version) is identical, so the ETag is
+    known before the view runs: a matching If-None-Match (compared weakly,
+    as compression.py weakens the ETag of what it compresses) is answered
+    with 304 in before_request, without computing or serializing anything.
+    Successful responses get the ETag and
+    Cache-Control: public, max-age=API_CACHE_MAX_AGE.
+    """
+    app.config.setdefault("API_CACHE_MAX_AGE", DEFAULT_MAX_AGE)
+
+    def cacheable():
+        return request.method in ("GET", "HEAD") and request.path.startswith("/api/")
+
+    def current_etag():
+        return make_etag(request.path, canonical_params(request.args), ctx.version)
+
+    @app.before_request
+    def answer_not_modified():
+        if not cacheable() or not request.if_none_match:
+            return None
+        etag = current_etag()
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = app.config["API_CACHE_MAX_AGE"]
+            return response
+        return None
+
+    @app.after_request
+    def add_validators(response):
+        if not cacheable() or response.status_code != 200:
+            return response
+        if g.get("http_no_store"):
+            response.cache_control.no_store = True
+            return response
+        response.set_etag(current_etag())
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config["API_CACHE_MAX_AGE"]
+        return response
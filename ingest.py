@@ -0,0 +1,320 @@
+# ingest.py
+
+import fcntl
+import hashlib
+import io
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from flask import jsonify, request
+
+from admin import is_admin
+from data_handle import SUBREQUEST
+from snapshot import CSV_FILES, READ_OPTIONS
+
+# how often (seconds) a serving process checks the CSVs for appended rows
+DEFAULT_POLL_SECONDS = 1.0
+
+# taken exclusively while rows are appended, shared while sizes are read,
+# so a reader never sees a match without its deliveries
+LOCK_FILE = ".ingest.lock"
+
+# touching this file (manage.py reload, POST /api/admin/reload) makes every
+# serving process reload the CSVs from scratch
+RELOAD_FILE = ".reload"
+
+# bytes before the applied offset compared to tell an append from a rewrite
+TAIL_BYTES = 4096
+
+
+@contextmanager
+def _locked(data_dir: str, exclusive: bool):
+    try:
+        fh = open(os.path.join(data_dir, LOCK_FILE), "a")
+    except OSError:
+        # read-only data dir: nothing can append to it anyway
+        yield
+        return
+    with fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def csv_stats(data_dir: str) -> dict:
+    """
+    (size, inode, mtime_ns) of each CSV that exists (none, for a data dir
+    loaded from Cricsheet JSON), read while no append is in progress.
+    """
+    with _locked(data_dir, exclusive=False):
+        stats = {}
+        for name, file in CSV_FILES.items():
+            try:
+                st = os.stat(os.path.join(data_dir, file))
+            except FileNotFoundError:
+                continue
+            stats[name] = (st.st_size, st.st_ino, st.st_mtime_ns)
+        return stats
+
+
+def reload_requested(data_dir: str):
+    """The mtime of RELOAD_FILE in `data_dir`, None when it doesn't exist."""
+    try:
+        return os.stat(os.path.join(data_dir, RELOAD_FILE)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def request_reload(data_dir: str):
+    """Touch RELOAD_FILE, so every serving process reloads its data."""
+    with open(os.path.join(data_dir, RELOAD_FILE), "a"):
+        pass
+    os.utime(os.path.join(data_dir, RELOAD_FILE))
+
+
+def read_appended(data_dir: str, name: str, since: int, until: int):
+    """
+    Parse the rows of CSV `name` between byte offsets `since` and `until`
+    (with READ_OPTIONS, like the full load). Returns (frame, end), where
+    `end` is the offset after the last complete line read.
+    """
+    with open(os.path.join(data_dir, CSV_FILES[name]), "rb") as fh:
+        header = fh.readline()
+        fh.seek(since)
+        chunk = fh.read(until - since)
+    chunk = chunk[:chunk.rfind(b"\n") + 1]
+    frame = pd.read_csv(io.BytesIO(header + chunk), **READ_OPTIONS[name])
+    return frame, since + len(chunk)
+
+
+def _header(path: str) -> list:
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def _check_columns(name: str, frame: pd.DataFrame, header: list):
+    missing = [c for c in header if c not in frame.columns]
+    extra = [c for c in frame.columns if c not in header]
+    if missing or extra:
+        raise ValueError(f"{name}: missing columns {missing}, unknown columns {extra}")
+
+
+def append_rows(data_dir: str, matches: pd.DataFrame, deliveries: pd.DataFrame) -> list:
+    """
+    Append new matches and their deliveries to the CSVs in `data_dir`.
+    Raises ValueError, before writing anything, when the columns don't
+    match the files, match ids are missing, repeated or already present,
+    or a delivery belongs to a match not in `matches`. Returns the ids of
+    the appended matches.
+    """
+    paths = {name: os.path.join(data_dir, file) for name, file in CSV_FILES.items()}
+    if not all(os.path.exists(path) for path in paths.values()):
+        raise ValueError(f"{data_dir} has no CSVs to append to")
+    headers = {name: _header(path) for name, path in paths.items()}
+    _check_columns("matches", matches, headers["matches"])
+    _check_columns("deliveries", deliveries, headers["deliveries"])
+
+    ids = pd.to_numeric(matches["id"], errors="coerce")
+    if ids.isna().any():
+        raise ValueError("matches: every row needs a numeric id")
+    if ids.duplicated().any():
+        raise ValueError("matches: repeated ids")
+    delivery_ids = pd.to_numeric(deliveries["match_id"], errors="coerce")
+    orphans = sorted(set(delivery_ids.dropna()) - set(ids)) + ([None] if delivery_ids.isna().any() else [])
+    if orphans:
+        raise ValueError(f"deliveries: rows for matches not in this batch: {orphans[:10]}")
+
+    with _locked(data_dir, exclusive=True):
+        known = pd.read_csv(paths["matches"], usecols=["id"])["id"]
+        dup = sorted(set(ids).intersection(known))
+        if dup:
+            raise ValueError(f"matches already present: {dup[:10]}")
+        for name, frame in (("matches", matches), ("deliveries", deliveries)):
+            with open(paths[name], "rb+") as fh:
+                fh.seek(0, os.SEEK_END)
+                if fh.tell():
+                    fh.seek(-1, os.SEEK_END)
+                    if fh.read(1) != b"\n":
+                        fh.write(b"\n")
+            with open(paths[name], "a", newline="") as fh:
+                frame.to_csv(fh, header=False, index=False, columns=headers[name])
+                fh.flush()
+                os.fsync(fh.fileno())
+    return [int(i) for i in ids]
+
+
+class Ingestor:
+    """
+    Applies rows appended to the CSVs (append_rows, or any writer using
+    the same lock) to the live DataContext of one process: the new rows
+    are read from the byte offset last applied, merged in with
+    DataContext.extend, the result swapped in through the DataHandle and
+    the result-cache entries of the touched seasons dropped.
+
+    The CSVs act as an append-only log, so every process (each pre-fork
+    worker) catches up on its own and ends at the same data version.
+    Anything else (a CSV replaced, edited or truncated, or RELOAD_FILE
+    touched) is handed to `reloader` (reload.py) when one is attached.
+    """
+
+    def __init__(self, handle, data_dir: str, stats: dict):
+        self.handle = handle
+        self.data_dir = data_dir
+        self.reloader = None
+        self.next_poll = 0.0
+        self.last = None    # summary of the last applied batch
+        self.trigger = reload_requested(data_dir)
+        self.rebase(stats, handle.ctx.version)
+
+    def rebase(self, stats: dict, version: str):
+        """Start over from a full load of the CSVs as they were at `stats`."""
+        self.stats = dict(stats)
+        self.offsets = {name: st[0] for name, st in stats.items()}
+        self.tails = {name: self._tail(name, size) for name, size in self.offsets.items()}
+        self.base_version = version
+        self._skip = None   # stats that failed to apply; retried once they change
+
+    def _tail(self, name: str, end: int) -> bytes:
+        with open(os.path.join(self.data_dir, CSV_FILES[name]), "rb") as fh:
+            fh.seek(max(0, end - TAIL_BYTES))
+            return fh.read(end - fh.tell())
+
+    def _appended_only(self, stats: dict) -> bool:
+        """True when every CSV only grew past the applied offset."""
+        if stats.keys() != self.stats.keys() or not stats:
+            return False
+        for name, (size, inode, _) in stats.items():
+            seen_size, seen_inode, _ = self.stats[name]
+            if inode != seen_inode or size < self.offsets[name]:
+                return False
+            if size == seen_size and stats[name] != self.stats[name]:
+                return False    # rewritten in place
+            if self._tail(name, self.offsets[name]) != self.tails[name]:
+                return False
+        return True
+
+    def version(self, offsets: dict) -> str:
+        """Data version after applying the CSVs up to `offsets`."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{self.base_version}:{offsets['matches']}:{offsets['deliveries']}".encode())
+        return h.hexdigest()
+
+    def poll(self, wait: bool = False):
+        """
+        Apply whatever was appended since the last poll. Returns a summary
+        dict, or None when there was nothing to apply, another poll holds
+        the lock (unless `wait`), the change needs a full reload, or
+        applying failed (logged).
+        """
+        if not self.handle.lock.acquire(blocking=wait):
+            return None
+        try:
+            trigger = reload_requested(self.data_dir)
+            if trigger != self.trigger and self.reloader is not None:
+                self.trigger = trigger
+                self.reloader.start()
+                return None
+            stats = csv_stats(self.data_dir)
+            if stats == self.stats or stats == self._skip:
+                return None
+            if not self._appended_only(stats):
+                self._skip = stats
+                if self.reloader is not None:
+                    self.reloader.start()
+                else:
+                    print(" * data CSVs were rewritten; restart to load them", file=sys.stderr)
+                return None
+            try:
+                summary = self._apply(stats)
+            except (OSError, ValueError, KeyError) as e:
+                self._skip = stats
+                print(f" * ingest failed: {e}", file=sys.stderr)
+                return None
+            self.stats = stats
+            return summary
+        finally:
+            self.handle.lock.release()
+
+    def _apply(self, stats: dict) -> dict:
+        start = time.perf_counter()
+        frames, offsets = {}, {}
+        for name in CSV_FILES:
+            frames[name], offsets[name] = read_appended(
+                self.data_dir, name, self.offsets[name], stats[name][0])
+        matches, deliveries = frames["matches"], frames["deliveries"]
+
+        # rows already in the loaded data (appended while it was loading)
+        ctx = self.handle.ctx
+        matches = matches[~matches["id"].isin(ctx.matches["id"])]
+        deliveries = deliveries[deliveries["match_id"].isin(matches["id"])]
+
+        seasons = []
+        if len(matches):
+            seasons = sorted(set(int(y) for y in matches["date"].dt.year))
+            extended = ctx.extend(matches, deliveries, self.version(offsets))
+            if self.handle.caches is not None:
+                # requests pinned until the stale results are gone bypass the caches
+                with self.handle.caches.invalidating(seasons):
+                    self.handle.swap(extended)
+            else:
+                self.handle.swap(extended)
+        self.offsets = offsets
+        self.tails = {name: self._tail(name, end) for name, end in offsets.items()}
+        self.last = {
+            "version":    self.handle.ctx.version,
+            "matches":    len(matches),
+            "deliveries": len(deliveries),
+            "seasons":    seasons,
+            "ms":         round((time.perf_counter() - start) * 1e3, 1),
+        }
+        return self.last
+
+
+def register_ingest(app, handle, data_dir: str, stats: dict) -> Ingestor:
+    """
+    Pick up rows appended to the CSVs while serving, and accept new ones:
+      - every INGEST_POLL_SECONDS (0 disables) the next request first
+        applies anything appended since the last check (see Ingestor)
+      - POST /api/admin/ingest (X-Admin-Token required) with
+        {"matches": [...], "deliveries": [...]} rows keyed by CSV column
+        appends them and applies them at once; returns what was applied
+    `stats` are the csv_stats() taken just before the data was loaded.
+    Register this before register_data_handle, so the request that polls
+    already sees the new data.
+    """
+    app.config.setdefault("INGEST_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+    ingestor = Ingestor(handle, data_dir, stats)
+    app.extensions["ingest"] = ingestor
+
+    @app.before_request
+    def poll_appended():
+        if request.environ.get(SUBREQUEST):
+            return   # batch sub-requests stay on the batch's data
+        interval = app.config["INGEST_POLL_SECONDS"]
+        now = time.monotonic()
+        if interval > 0 and now >= ingestor.next_poll:
+            ingestor.next_poll = now + interval
+            ingestor.poll()
+
+    @app.route("/api/admin/ingest", methods=["POST"])
+    def admin_ingest():
+        if not is_admin():
+            return jsonify({"error": "Ingest requires a valid X-Admin-Token"}), 403
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body.get("matches"), list) or not isinstance(body.get("deliveries"), list):
+            return jsonify({"error": "Body must be {\"matches\": [...], \"deliveries\": [...]}"}), 400
+        try:
+            ids = append_rows(data_dir, pd.DataFrame(body["matches"]), pd.DataFrame(body["deliveries"]))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # a concurrent request's poll may have applied them already
+        summary = ingestor.poll(wait=True) or ingestor.last
+        if handle.ctx.matches["id"].isin(ids).sum() < len(ids):
+            return jsonify({"error": "Rows were appended but could not be applied; see the server log"}), 500
+        return jsonify(summary)
+
+    return ingestor
@@ -0,0 +1,97 @@
+# json_provider.py
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:     # optional: the stdlib encoder is used instead
+    orjson = None
+
+
+def records(df: pd.DataFrame) -> list:
+    """
+    `df` as a list of row dicts, like df.to_dict("records") but built from
+    one tolist() per column instead of boxing every cell, and with missing
+    values (NaN, NaT, None) as None.
+    """
+    columns = [str(c) for c in df.columns]
+    values = [col.astype(object).where(col.notna(), None).tolist() if col.hasnans else col.tolist()
+              for _, col in df.items()]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with two changes:
+      - NaN and ±Infinity are written as null, so every response is valid
+        JSON (the stdlib encoder writes bare NaN)
+      - DataFrames, Series, NumPy arrays and NumPy scalars can be passed to
+        jsonify as they are: a DataFrame becomes its records (see
+        records()), a Series a {index: value} object, an array a list
+    With orjson installed it does the encoding (numpy arrays natively);
+    otherwise the stdlib encoder runs, and a payload that turns out to
+    hold a non-finite float is cleaned and encoded again. Output is
+    otherwise what Flask writes: sorted keys, dates as HTTP dates,
+    compact unless in debug mode.
+    """
+
+    def default(self, o):
+        if isinstance(o, pd.DataFrame):
+            return records(o)
+        if isinstance(o, pd.Series):
+            return dict(zip(map(str, o.index.tolist()), o.tolist()))
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        if o is pd.NA or o is pd.NaT:
+            return None
+        return super().default(o)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._encode(obj, **kwargs).decode() if orjson is not None \
+            else self._encode_stdlib(obj, **kwargs)
+
+    def _encode(self, obj, indent=None, **kwargs) -> bytes:
+        if orjson is None:
+            return self._encode_stdlib(obj, indent=indent, **kwargs).encode()
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def _encode_stdlib(self, obj, **kwargs) -> str:
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        try:
+            return json.dumps(obj, allow_nan=False, **kwargs)
+        except ValueError:
+            return json.dumps(self._finite(obj), **kwargs)
+
+    def _finite(self, o):
+        """`o` with non-finite floats replaced by None (stdlib path only)."""
+        if isinstance(o, float):
+            return o if math.isfinite(o) else None
+        if isinstance(o, (str, int)) or o is None:
+            return o
+        if isinstance(o, dict):
+            return {k: self._finite(v) for k, v in o.items()}
+        if isinstance(o, (list, tuple)):
+            return [self._finite(v) for v in o]
+        return self._finite(self.default(o))
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self._encode(obj, indent=2)
+        else:
+            body = self._encode(obj, separators=(",", ":"))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,187 @@
+# leaderboard.py
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+from datastore import canonical_years, years_label
+from result_cache import cached
+
+# rows returned when ?k= is absent
+DEFAULT_K = 10
+
+# fantasy points per (player, match), scored as for the MVP ranking
+POINTS_COLUMNS = ["batting_pts", "mvp_bowling_pts", "fielding_pts"]
+
+
+class Metric:
+    """
+    One leaderboard. `value(sums)` turns per-player totals (arrays from
+    player_sums) into the ranked value; it defaults to the total of the
+    first of `columns`, which (with `per`) are returned next to it.
+    A player qualifies with at least `min_count` of `per` (balls faced,
+    balls bowled or matches; overridable per request) and, when
+    `positive`, a value above zero. `ascending` ranks the lowest first.
+    """
+
+    __slots__ = ("columns", "value", "per", "min_count", "positive", "ascending")
+
+    def __init__(self, columns, value=None, per=None, *, min_count=1,
+                 positive=False, ascending=False):
+        self.columns = list(columns)
+        self.value = value or (lambda sums: sums[self.columns[0]])
+        self.per = per
+        self.min_count = min_count
+        self.positive = positive
+        self.ascending = ascending
+
+    @property
+    def threshold_param(self):
+        """The query parameter that overrides min_count (None without `per`)."""
+        if self.per is None:
+            return None
+        return "min_matches" if self.per == "matches" else "min_balls"
+
+
+METRICS = {
+    # batting, from balls faced
+    "runs":        Metric(["runs"], per="balls"),
+    "fours":       Metric(["fours"], per="balls", positive=True),
+    "sixes":       Metric(["sixes"], per="balls", positive=True),
+    "strike_rate": Metric(["runs"], lambda s: s["runs"] / s["balls"] * 100,
+                          per="balls", min_count=100),
+    # bowling, from every ball bowled (as the scatter plot does)
+    "wickets":     Metric(["wickets"], per="bowl_balls", positive=True),
+    "dots":        Metric(["dots"], per="bowl_balls", positive=True),
+    "economy":     Metric(["runs_conceded"], lambda s: s["runs_conceded"] * 6 / s["bowl_balls"],
+                          per="bowl_balls", min_count=120, ascending=True),
+    # fielding
+    "catches":     Metric(["catches"], positive=True),
+    "run_outs":    Metric(["run_outs"], positive=True),
+    "fielding":    Metric(["catches", "run_outs"], lambda s: s["catches"] + s["run_outs"],
+                          positive=True),
+    # fantasy points, from the points ledger
+    "points":      Metric(["points"], per="matches"),
+    "avg_points":  Metric(["points"], lambda s: s["points"] / s["matches"],
+                          per="matches", min_count=10),
+}
+
+
+def ledger_sums(ctx, years_param, team: str = None) -> dict:
+    """
+    Fantasy "points" and "matches" per player over the requested seasons
+    (with `team`, only matches for that team), indexed by player code like
+    DataContext.player_sums. Raises KeyError for an unknown team.
+    """
+    led = ctx.ledger_for(years_param)
+    codes = led["player"].cat.codes.to_numpy()
+    n = len(led["player"].cat.categories)
+    points = sum(led[col].to_numpy(dtype="float64", na_value=0.0) for col in POINTS_COLUMNS)
+    if team is not None:
+        team_code = led["team"].cat.categories.get_loc(team)
+        rows = led["team"].cat.codes.to_numpy() == team_code
+        codes, points = codes[rows], points[rows]
+    return {
+        "points":  np.bincount(codes, weights=points, minlength=n),
+        "matches": np.bincount(codes, minlength=n),
+    }
+
+
+def top_k(values: np.ndarray, k: int, ascending: bool = False) -> np.ndarray:
+    """
+    Positions of the `k` best `values`, best first. np.argpartition finds
+    the k-th best value in linear time; everything tied with it is kept
+    and the few candidates sorted stably, so ties go to the lower
+    position (the player's name order), wherever the partition fell.
+    """
+    key = values if ascending else -values
+    if k < len(key):
+        kth = key[np.argpartition(key, k - 1)[k - 1]]
+        candidates = np.flatnonzero(key <= kth)
+    else:
+        candidates = np.arange(len(key))
+    return candidates[np.argsort(key[candidates], kind="stable")[:k]]
+
+
+def leaderboard(ctx, metric: str, k: int = DEFAULT_K, years_param="all",
+                team: str = None, min_count: int = None, columns=()) -> pd.DataFrame:
+    """
+    The top `k` qualifying players by METRICS[metric] over the requested
+    seasons (and `team`), best first, as a frame with columns player,
+    <metric>, then the metric's columns and `per` total and any extra
+    `columns` (cube columns, summed alike). Raises KeyError for an
+    unknown metric or team.
+    """
+    spec = METRICS[metric]
+    if spec.per == "matches":
+        sums = ledger_sums(ctx, years_param, team)
+    else:
+        sums = ctx.player_sums(years_param, team)
+
+    qualified = np.ones(len(next(iter(sums.values()))), dtype=bool)
+    if spec.per is not None:
+        threshold = spec.min_count if min_count is None else min_count
+        qualified &= sums[spec.per] >= max(threshold, 1)
+    positions = np.flatnonzero(qualified)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = spec.value(sums)[positions]
+    if spec.positive:
+        positions, values = positions[values > 0], values[values > 0]
+    best = top_k(values, k, spec.ascending)
+    chosen = positions[best]
+
+    players = ctx.cube["player"].cat.categories
+    board = {"player": players[chosen].astype(object), metric: values[best]}
+    for col in [*spec.columns, spec.per, *columns]:
+        if col is not None and col not in board:
+            board[col] = sums[col][chosen]
+    return pd.DataFrame(board)
+
+
+def register_leaderboard_routes(app, ctx):
+    """
+    Registers:
+      - GET /api/leaderboard?metric=runs&k=10&years=...&team=...&min_balls=...
+        metric is one of METRICS; min_balls (balls faced or bowled) or, for
+        the fantasy-points metrics, min_matches overrides the metric's
+        qualification threshold. team limits everything to what players
+        did for that team.
+    """
+
+    @app.route("/api/leaderboard")
+    @cached
+    def leaderboard_route():
+        metric = request.args.get("metric", "runs")
+        if metric not in METRICS:
+            return jsonify({"error": f"Unknown metric '{metric}'; one of {', '.join(METRICS)}"}), 400
+        spec = METRICS[metric]
+        years = request.args.get("years", "all")
+        team = request.args.get("team") or None
+        param = spec.threshold_param
+        try:
+            k = int(request.args.get("k", DEFAULT_K))
+        except ValueError:
+            return jsonify({"error": "k must be an integer"}), 400
+        if k < 1:
+            return jsonify({"error": "k must be at least 1"}), 400
+        min_count = request.args.get(param) if param else None
+        if min_count is not None:
+            try:
+                min_count = int(min_count)
+            except ValueError:
+                return jsonify({"error": f"{param} must be an integer"}), 400
+
+        try:
+            board = leaderboard(ctx, metric, k, years, team, min_count)
+        except KeyError:
+            return jsonify({"error": f"No matches found for '{team}'"}), 404
+        board.insert(0, "rank", np.arange(1, len(board) + 1))
+        out = {
+            "metric": metric,
+            "years":  years_label(canonical_years(years)),
+            "team":   team,
+            "rows":   board,
+        }
+        if param:
+            out[param] = spec.min_count if min_count is None else min_count
+        return jsonify(out)
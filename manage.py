@@ -0,0 +1,104 @@
+# manage.py
+
+import argparse
+import os
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+# the CSVs the app loads (same default and IPL_DATA_DIR override as app.py)
+DATA_DIR = os.environ.get("IPL_DATA_DIR", os.path.join(BASE, "data"))
+
+# where `export` writes and the app looks for pre-rendered /api/* JSON
+EXPORT_DIR = os.path.join(BASE, "frontend", "data", "api")
+
+
+def cmd_export(args):
+    """Pre-render the /api/* responses into versioned static JSON."""
+    # render from the live routes, never from a previous export
+    os.environ["IPL_STATIC_API"] = "0"
+    from app import app, ctx
+    from static_export import export_static
+
+    manifest = export_static(app, ctx, args.out)
+    print(f"exported {len(manifest['files'])} responses for data version "
+          f"{manifest['version']} to {args.out}")
+
+
+def cmd_serve(args):
+    """Run the pre-fork production server."""
+    from app import app
+    from prefork import serve
+
+    serve(app, args.host, args.port, args.workers)
+
+
+def cmd_ingest(args):
+    """Append new matches and their deliveries to the data CSVs."""
+    import pandas as pd
+    from ingest import append_rows
+
+    try:
+        if args.cricsheet:
+            from cricsheet import load_cricsheet
+            matches, deliveries = load_cricsheet(args.cricsheet, args.workers)
+        elif args.matches and args.deliveries:
+            # rows are copied verbatim: the app parses them like the rest of the file
+            read = dict(dtype=str, keep_default_na=False)
+            matches = pd.read_csv(args.matches, **read)
+            deliveries = pd.read_csv(args.deliveries, **read)
+        else:
+            raise ValueError("give --matches and --deliveries, or --cricsheet")
+        ids = append_rows(args.data_dir, matches, deliveries)
+    except ValueError as e:
+        raise SystemExit(f"ingest: {e}")
+    print(f"appended {len(ids)} matches to {args.data_dir}; "
+          f"running servers apply them on their next poll")
+
+
+def cmd_reload(args):
+    """Make running servers rebuild their data from the CSVs."""
+    from ingest import request_reload
+
+    request_reload(args.data_dir)
+    print(f"reload requested for {args.data_dir}; running servers swap in the "
+          f"new data once it is built")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IPL dashboard management commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help=cmd_export.__doc__)
+    export.add_argument("--out", default=EXPORT_DIR,
+                        help="output directory (default: frontend/data/api)")
+    export.set_defaults(func=cmd_export)
+
+    serve = sub.add_parser("serve", help=cmd_serve.__doc__)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="worker processes (default: one per CPU)")
+    serve.set_defaults(func=cmd_serve)
+
+    ingest = sub.add_parser("ingest", help=cmd_ingest.__doc__)
+    ingest.add_argument("--matches", help="CSV of new matches (matches.csv columns)")
+    ingest.add_argument("--deliveries", help="CSV of their deliveries (deliveries.csv columns)")
+    ingest.add_argument("--cricsheet",
+                        help="instead: a Cricsheet JSON download (directory or .zip) of new matches")
+    ingest.add_argument("--workers", type=int, default=None,
+                        help="processes parsing --cricsheet files (default: one per CPU)")
+    ingest.add_argument("--data-dir", default=DATA_DIR,
+                        help="directory holding matches.csv and deliveries.csv (default: data)")
+    ingest.set_defaults(func=cmd_ingest)
+
+    reload = sub.add_parser("reload", help=cmd_reload.__doc__)
+    reload.add_argument("--data-dir", default=DATA_DIR,
+                        help="directory holding matches.csv and deliveries.csv (default: data)")
+    reload.set_defaults(func=cmd_reload)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# metrics.py
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from flask import request
+
+from data_handle import SUBREQUEST
+
+# latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_START = "metrics.start"
+
+# seconds between a worker's snapshot writes when metrics are shared
+FLUSH_INTERVAL = 1.0
+
+
+class _Route:
+    __slots__ = ("buckets", "count", "seconds", "bytes", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)   # last slot is +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """
+    Per-route request counters kept in plain Python containers: one lock,
+    one bisect and a few integer adds per request. Routes are labelled by
+    their URL rule (e.g. /api/individual), so the label set is bounded by
+    the app's routes; unmatched paths share one label.
+
+    With share(directory), each process also writes its snapshot to
+    <directory>/<pid>.json every FLUSH_INTERVAL seconds and merged()
+    sums every process's file, so any worker can answer /metrics for all.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.directory = None
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, method: str, status: int, seconds: float, size: int):
+        slot = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            r = self.routes.get((route, method))
+            if r is None:
+                r = self.routes[(route, method)] = _Route()
+            r.buckets[slot] += 1
+            r.count += 1
+            r.seconds += seconds
+            r.bytes += size
+            r.statuses[status] = r.statuses.get(status, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                key: (list(r.buckets), r.count, r.seconds, r.bytes, dict(r.statuses))
+                for key, r in self.routes.items()
+            }
+
+    def share(self, directory: str):
+        """
+        Start sharing through `directory` (called by the pre-fork master):
+        forget what the master recorded while warming up, so the workers
+        don't each inherit it.
+        """
+        with self._lock:
+            self.routes.clear()
+        self.directory = directory
+
+    def start_flusher(self):
+        """Write this process's snapshot every FLUSH_INTERVAL (per worker)."""
+        def loop():
+            while True:
+                time.sleep(FLUSH_INTERVAL)
+                self.flush()
+        threading.Thread(target=loop, name="metrics-flush", daemon=True).start()
+
+    def flush(self):
+        if self.directory is None:
+            return
+        rows = [[route, method, *values[:4], list(values[4].items())]
+                for (route, method), values in self.snapshot().items()]
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as fh:
+            json.dump(rows, fh)
+        os.replace(path + ".tmp", path)
+
+    def merged(self) -> dict:
+        """snapshot() plus every other process's last flushed snapshot."""
+        totals = self.snapshot()
+        if self.directory is None:
+            return totals
+        own = f"{os.getpid()}.json"
+        for name in os.listdir(self.directory):
+            if name == own or not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as fh:
+                    rows = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for route, method, buckets, count, seconds, size, statuses in rows:
+                key = (route, method)
+                b, c, sec, sz, st = totals.get(key, ([0] * len(buckets), 0, 0.0, 0, {}))
+                st = dict(st)
+                for status, n in statuses:
+                    st[status] = st.get(status, 0) + n
+                totals[key] = ([x + y for x, y in zip(b, buckets)], c + count,
+                               sec + seconds, sz + size, st)
+        return totals
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render(metrics: RequestMetrics, cache_registry=None, version: str = "") -> str:
+    """The Prometheus text exposition (format 0.0.4) of everything recorded."""
+    routes = sorted(metrics.merged().items())
+    lines = [
+        "# HELP ipl_http_requests_total Requests handled, by route, method and status.",
+        "# TYPE ipl_http_requests_total counter",
+    ]
+    for (route, method), (_, _, _, _, statuses) in routes:
+        for status, n in sorted(statuses.items()):
+            lines.append(f"ipl_http_requests_total{_labels(route=route, method=method, status=status)} {n}")
+
+    lines += [
+        "# HELP ipl_http_request_errors_total Responses with a 4xx (client) or 5xx (server) status.",
+        "# TYPE ipl_http_request_errors_total counter",
+    ]
+    for (route, method), (_, _, _, _, statuses) in routes:
+        for kind, lo in (("client", 400), ("server", 500)):
+            n = sum(c for s, c in statuses.items() if lo <= s < lo + 100)
+            if n:
+                lines.append(f"ipl_http_request_errors_total{_labels(route=route, method=method, kind=kind)} {n}")
+
+    lines += [
+        "# HELP ipl_http_request_duration_seconds Time from routing to the finished response.",
+        "# TYPE ipl_http_request_duration_seconds histogram",
+    ]
+    for (route, method), (buckets, count, seconds, _, _) in routes:
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), buckets):
+            cumulative += n
+            le = bound if bound == "+Inf" else repr(bound)
+            lines.append(f"ipl_http_request_duration_seconds_bucket{_labels(route=route, method=method, le=le)} {cumulative}")
+        lines.append(f"ipl_http_request_duration_seconds_sum{_labels(route=route, method=method)} {seconds!r}")
+        lines.append(f"ipl_http_request_duration_seconds_count{_labels(route=route, method=method)} {count}")
+
+    lines += [
+        "# HELP ipl_http_response_bytes_total Response body bytes sent.",
+        "# TYPE ipl_http_response_bytes_total counter",
+    ]
+    for (route, method), (_, _, _, size, _) in routes:
+        lines.append(f"ipl_http_response_bytes_total{_labels(route=route, method=method)} {size}")
+
+    if cache_registry is not None:
+        stats = cache_registry.stats()
+        for name, key, kind, help_text in (
+            ("ipl_result_cache_hits_total", "hits", "counter", "Result cache hits."),
+            ("ipl_result_cache_misses_total", "misses", "counter", "Result cache misses."),
+            ("ipl_result_cache_evictions_total", "evictions", "counter", "Result cache evictions."),
+            ("ipl_result_cache_bytes", "bytes", "gauge", "Bytes held by the result cache."),
+            ("ipl_result_cache_entries", "entries", "gauge", "Entries in the result cache."),
+            ("ipl_result_cache_hit_ratio", "hit_rate", "gauge", "Hits / lookups of the result cache."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for endpoint, s in stats.items():
+                if s[key] is not None:
+                    lines.append(f"{name}{_labels(endpoint=endpoint)} {s[key]}")
+
+    lines += [
+        "# HELP ipl_data_info Loaded dataset version and serving process.",
+        "# TYPE ipl_data_info gauge",
+        f"ipl_data_info{_labels(version=version, pid=os.getpid())} 1",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def register_metrics(app, ctx):
+    """
+    Time every request and serve GET /metrics in Prometheus text format.
+    Register this before the other before_request hooks (HTTP cache,
+    static export) so requests they answer early are timed as well.
+    Under `manage.py serve` the request counters are merged across
+    workers (see RequestMetrics.share); the result-cache figures are those
+    of the worker that answers.
+    """
+    metrics = RequestMetrics()
+    app.extensions["metrics"] = metrics
+
+    @app.before_request
+    def start_timer():
+        # a batch's sub-requests are timed as part of the POST /api/batch
+        if not request.environ.get(SUBREQUEST):
+            request.environ[_START] = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        start = request.environ.get(_START)
+        if start is not None:
+            rule = request.url_rule
+            metrics.observe(
+                rule.rule if rule is not None else "<unmatched>",
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                response.content_length or 0,
+            )
+        return response
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        body = render(metrics, app.extensions.get("result_cache"), ctx.version)
+        return app.response_class(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return metrics
@@ -0,0 +1,135 @@
+# player_names.py
+
+import bisect
+import heapq
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    """
+    Name lookups built once from the deliveries table:
+      - exact:    lowercase name → canonical name
+      - surname:  (surname, first initial) → candidates, in name order
+      - matches:  canonical name → matches played as batter or bowler
+      - trigrams: trigram → ids of names containing it (fuzzy suggest)
+    """
+
+    def __init__(self, deliveries: pd.DataFrame):
+        self._build(self._match_counts(deliveries))
+
+    def _build(self, matches: dict):
+        names = sorted(n for n in matches if isinstance(n, str) and n.strip())
+        self.names = names
+        self.matches = {n: matches[n] for n in names}
+
+        self.exact = {}
+        self.surname = defaultdict(list)
+        self.trigrams = defaultdict(list)
+        for i, name in enumerate(names):
+            low = name.lower()
+            # first name in sorted order wins, as the old linear scan did
+            self.exact.setdefault(low, name)
+            words = low.split()
+            self.surname[(words[-1], words[0][0])].append(name)
+            for gram in _trigrams(low):
+                self.trigrams[gram].append(i)
+
+        # (lowercase name, id) and (lowercase surname, id), for prefix search
+        self._by_name = sorted((n.lower(), i) for i, n in enumerate(names))
+        self._by_surname = sorted((n.lower().split()[-1], i) for i, n in enumerate(names))
+
+    def extended(self, deliveries: pd.DataFrame) -> "PlayerNameIndex":
+        """
+        A new index that also covers `deliveries`, rows of matches this
+        index hasn't seen: their per-player match counts are added to the
+        current ones instead of recounting the whole table.
+        """
+        matches = dict(self.matches)
+        for name, n in self._match_counts(deliveries).items():
+            matches[name] = matches.get(name, 0) + n
+        index = PlayerNameIndex.__new__(PlayerNameIndex)
+        index._build(matches)
+        return index
+
+    @staticmethod
+    def _match_counts(deliveries: pd.DataFrame) -> dict:
+        """Distinct matches per player across the batter and bowler columns."""
+        categories = deliveries["batter"].cat.categories
+        match_ids = deliveries["match_id"].to_numpy()
+        pairs = pd.DataFrame({
+            "player":   np.concatenate([deliveries["batter"].cat.codes, deliveries["bowler"].cat.codes]),
+            "match_id": np.concatenate([match_ids, match_ids]),
+        }).drop_duplicates()
+        pairs = pairs[pairs["player"] >= 0]
+        counts = np.bincount(pairs["player"], minlength=len(categories))
+        return {categories[c]: int(counts[c]) for c in np.flatnonzero(counts)}
+
+    def resolve(self, raw: str, require_initial: bool = False) -> str | None:
+        """
+        Resolve a raw input string to one of the canonical player names.
+        Exact (case-insensitive) match first; then surname + initial, picking
+        the candidate who played the most matches. With `require_initial`,
+        single-word queries don't get the surname fallback.
+        """
+        q = raw.strip()
+        if not q:
+            return None
+
+        low = q.lower()
+        if low in self.exact:
+            return self.exact[low]
+
+        parts = low.split()
+        if require_initial and len(parts) < 2:
+            return None
+        candidates = self.surname.get((parts[-1], parts[0][0]))
+        if not candidates:
+            return None
+        return max(candidates, key=self.matches.__getitem__)
+
+    @staticmethod
+    def _prefixed(keys: list, prefix: str) -> list:
+        """Ids of every key starting with `prefix` (keys sorted by text)."""
+        lo = bisect.bisect_left(keys, (prefix, -1))
+        hi = bisect.bisect_left(keys, (prefix + "\U0010ffff", -1), lo)
+        return [i for _, i in keys[lo:hi]]
+
+    def suggest(self, q: str, limit: int = 10) -> list:
+        """
+        Autocomplete: names whose full name or surname starts with `q`, then
+        trigram-similar names to fill up to `limit`. Each group is ordered by
+        matches played.
+        """
+        low = q.strip().lower()
+        if not low:
+            return []
+
+        prefix = set(self._prefixed(self._by_name, low))
+        prefix.update(self._prefixed(self._by_surname, low))
+        ranked = heapq.nsmallest(limit, prefix,
+                                 key=lambda i: (-self.matches[self.names[i]], self.names[i]))
+
+        if len(ranked) < limit:
+            grams = _trigrams(low)
+            scores = defaultdict(int)
+            for gram in grams:
+                for i in self.trigrams.get(gram, ()):
+                    scores[i] += 1
+            # require a third of the query's trigrams to match
+            floor = max(1, len(grams) // 3)
+            fuzzy = [i for i, s in scores.items() if s >= floor and i not in prefix]
+            fuzzy.sort(key=lambda i: (-scores[i], -self.matches[self.names[i]], self.names[i]))
+            ranked.extend(fuzzy)
+
+        return [
+            {"name": self.names[i], "matches": self.matches[self.names[i]]}
+            for i in ranked[:limit]
+        ]
@@ -1,268 +1,259 @@
 # pointValue.py
 
+import numpy as np
 import pandas as pd
 
-# dismissal kinds that count as wickets (excluding run out)
-WICKET_KINDS = {
-    "bowled", "caught", "lbw", "stumped",
-    "caught and bowled", "hit wicket"
-}
+from profiling import span
 
-def compute_match_points(deliveries: pd.DataFrame, player: str) -> dict:
+def batting_points(runs, balls, fours, sixes):
     """
-    Compute per‐match points for `player`. Returns { match_id: points }.
+    Whole-column batting points from per-(player, match) totals: runs plus
+    boundary bonuses, milestone bonus and strike-rate band.
     """
-    pts = {}
+    runs, balls = np.asarray(runs), np.asarray(balls)
+    sr = np.divide(runs, balls, out=np.zeros(len(runs)), where=balls > 0) * 100
+    pts = runs + np.asarray(fours)*4 + np.asarray(sixes)*6
+    pts = pts + np.select(
+        [runs >= 100, runs >= 75, runs >= 50, runs > 25],
+        [16, 12, 8, 4], 0
+    )
+    pts = pts + np.select(
+        [sr > 170, sr > 150, sr >= 130,
+         (60 <= sr) & (sr < 70), (50 <= sr) & (sr < 60), sr < 50],
+        [6, 4, 2, -2, -4, -6], 0
+    )
+    return pts
 
-    # 1) Batting
-    if "batter" in deliveries.columns and "batsman_runs" in deliveries.columns:
-        bat = deliveries[deliveries["batter"] == player]
-        for mid, df in bat.groupby("match_id"):
-            runs  = df["batsman_runs"].sum()
-            balls = len(df)
-            fours = (df["batsman_runs"] == 4).sum()
-            sixes = (df["batsman_runs"] == 6).sum()
-            sr    = (runs / balls * 100) if balls > 0 else 0.0
 
-            b_pts = runs + fours*4 + sixes*6
-            if runs >= 100:   b_pts += 16
-            elif runs >= 75:  b_pts += 12
-            elif runs >= 50:  b_pts += 8
-            elif runs > 25:   b_pts += 4
-            if sr > 170:      b_pts += 6
-            elif sr > 150:    b_pts += 4
-            elif sr >= 130:   b_pts += 2
-            elif 60 <= sr < 70: b_pts -= 2
-            elif 50 <= sr < 60: b_pts -= 4
-            elif sr < 50:       b_pts -= 6
+def bowling_points(dots, wickets, lbw_bowled, runs_conceded, balls, maidens):
+    """
+    Whole-column bowling points from per-(player, match) totals: dots,
+    wickets, lbw/bowled bonus, haul bonus, maidens and economy band.
+    `balls` are legal deliveries; no legal balls counts as infinite economy.
+    """
+    wickets = np.asarray(wickets)
+    balls = np.asarray(balls)
+    pts = (
+        np.asarray(dots) + wickets*30 + np.asarray(lbw_bowled)*8 +
+        np.select([wickets == 3, wickets == 4, wickets >= 5], [4, 8, 12], 0) +
+        np.asarray(maidens)*12
+    )
+    overs = balls / 6
+    rpo = np.divide(
+        np.asarray(runs_conceded), overs,
+        out=np.full(len(balls), np.inf), where=balls > 0
+    )
+    pts = pts + np.select(
+        [rpo < 5, rpo < 6, rpo < 7, rpo > 12, rpo > 11, rpo > 10],
+        [6, 4, 2, -6, -4, -2], 0
+    )
+    return pts
 
-            pts.setdefault(mid, 0)
-            pts[mid] += b_pts
 
-    # 2) Bowling
-    if "bowler" in deliveries.columns and "total_runs" in deliveries.columns:
-        bowl = deliveries[deliveries["bowler"] == player]
-        for mid, df in bowl.groupby("match_id"):
-            noball = df["noball_runs"] if "noball_runs" in df else pd.Series(0, index=df.index)
-            wide   = df["wide_runs"]   if "wide_runs"   in df else pd.Series(0, index=df.index)
+def fielding_points(catches, stumpings, runouts):
+    """Whole-column fielding points, including the 3-catch bonus."""
+    catches = np.asarray(catches)
+    return (
+        catches*8 + np.where(catches >= 3, 4, 0) +
+        np.asarray(stumpings)*12 + np.asarray(runouts)*6
+    )
 
-            dot_balls     = (df["total_runs"] == 0).sum()
-            wickets       = df["dismissal_kind"].isin(WICKET_KINDS).sum()
-            lbw_bowled    = df["dismissal_kind"].isin({"lbw", "bowled"}).sum()
-            runs_conceded = df["total_runs"].sum()
 
-            legal = df[(noball == 0) & (wide == 0)]
-            balls_bowled = len(legal)
-            overs = balls_bowled / 6 if balls_bowled > 0 else 0
+def _legal_mask(d: pd.DataFrame) -> np.ndarray:
+    """Legal deliveries by the noball_runs/wide_runs columns, when present."""
+    legal = np.ones(len(d), dtype=bool)
+    if "noball_runs" in d:
+        legal &= d["noball_runs"].to_numpy() == 0
+    if "wide_runs" in d:
+        legal &= d["wide_runs"].to_numpy() == 0
+    return legal
 
-            maidens = 0
-            if "inning" in df.columns and "over" in df.columns:
-                for (_, over), sub in df.groupby(["inning", "over"]):
-                    sub_nb = sub["noball_runs"] if "noball_runs" in sub else pd.Series(0, index=sub.index)
-                    sub_wd = sub["wide_runs"]   if "wide_runs"   in sub else pd.Series(0, index=sub.index)
-                    leg = sub[(sub_nb == 0) & (sub_wd == 0)]
-                    if len(leg) == 6 and leg["total_runs"].sum() == 0:
-                        maidens += 1
 
-            bwl_pts = (
-                dot_balls * 1 +
-                wickets * 30 +
-                lbw_bowled * 8 +
-                (4 if wickets == 3 else 8 if wickets == 4 else 12 if wickets >= 5 else 0) +
-                maidens * 12
-            )
-            rpo = (runs_conceded / overs) if overs > 0 else float("inf")
-            if rpo < 5:     bwl_pts += 6
-            elif rpo < 6:   bwl_pts += 4
-            elif rpo < 7:   bwl_pts += 2
-            elif rpo > 12:  bwl_pts -= 6
-            elif rpo > 11:  bwl_pts -= 4
-            elif rpo > 10:  bwl_pts -= 2
+def _bowling_table(d: pd.DataFrame, legal: np.ndarray, dot: np.ndarray) -> pd.DataFrame:
+    """
+    Per-(bowler, match) bowling points, given which balls count as legal
+    and which as dots. Maidens come from one grouped aggregation over
+    (bowler, match, inning, over): an over is a maiden when it has six
+    legal balls and none of them conceded a run.
+    """
+    runs = d["total_runs"].to_numpy()
+    balls = pd.DataFrame({
+        "player":     d["bowler"].array,
+        "match_id":   d["match_id"].to_numpy(),
+        "dot":        dot,
+        "wkt":        d["bowler_wicket"].to_numpy(),
+        "lbw":        d["dismissal_kind"].isin({"lbw", "bowled"}).to_numpy(),
+        "runs":       runs,
+        "legal":      legal,
+        "legal_runs": np.where(legal, runs, 0),
+    })
+    keys = ["player", "match_id"]
+    # plain multi-column sums: one grouped pass, unlike named aggregations
+    per_match = (
+        balls.groupby(keys, observed=True)[["dot", "wkt", "lbw", "runs", "legal"]]
+             .sum()
+             .rename(columns={"legal": "balls"})
+    )
 
-            pts.setdefault(mid, 0)
-            pts[mid] += bwl_pts
+    if "inning" in d and "over" in d:
+        balls["inning"] = d["inning"].to_numpy()
+        balls["over"] = d["over"].to_numpy()
+        per_over = balls.groupby(keys + ["inning", "over"], observed=True)[
+            ["legal", "legal_runs"]
+        ].sum()
+        maiden = (per_over["legal"] == 6) & (per_over["legal_runs"] == 0)
+        maidens = maiden.groupby(level=keys, observed=True).sum()
+        per_match["maidens"] = maidens.reindex(per_match.index, fill_value=0)
+    else:
+        per_match["maidens"] = 0
 
-    # 3) Fielding
-    if "fielder" in deliveries.columns and "dismissal_kind" in deliveries.columns:
-        fld = deliveries[deliveries["fielder"] == player]
-        for mid, df in fld.groupby("match_id"):
-            catches   = (df["dismissal_kind"] == "caught").sum()
-            stumpings = (df["dismissal_kind"] == "stumped").sum()
-            runouts   = (df["dismissal_kind"] == "run out").sum()
+    per_match["points"] = bowling_points(
+        per_match["dot"], per_match["wkt"], per_match["lbw"],
+        per_match["runs"], per_match["balls"], per_match["maidens"]
+    )
+    return per_match.reset_index()[["player", "match_id", "points"]]
 
-            f_pts = catches * 8 + (4 if catches >= 3 else 0) + stumpings * 12 + runouts * 6
-            pts.setdefault(mid, 0)
-            pts[mid] += f_pts
 
-    return pts
+def build_points_ledger(deliveries: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every ball once: one row per (player, match) the player took part
+    in, with columns
+      player, match_id, season, team,
+      batting_pts, bowling_pts, fielding_pts, mvp_bowling_pts
+    A points column is NaN when the player didn't bat/bowl/field that match.
+    Two bowling variants are kept because the two scoring paths always
+    differed on what a legal ball is:
+      - bowling_pts: wides/no-balls (extras_type) excluded from balls and dots,
+        used for career averages and win prediction
+      - mvp_bowling_pts: legality from noball_runs/wide_runs when those
+        columns exist (otherwise every ball), used for the MVP ranking
+    Points are stored as float32, which is exact for these integer values.
+    """
+    d = deliveries
+    keys = ["player", "match_id"]
+
+    # 1) batting
+    bat = (
+        pd.DataFrame({
+            "player":   d["batter"].array,
+            "match_id": d["match_id"].to_numpy(),
+            "runs":     d["batsman_runs"].to_numpy(),
+            "balls":    np.ones(len(d), dtype=np.int64),
+            "fours":    d["is_four"].to_numpy(),
+            "sixes":    d["is_six"].to_numpy(),
+        })
+        .groupby(keys, observed=True)
+        .sum()
+    )
+    batting = pd.Series(
+        batting_points(bat["runs"], bat["balls"], bat["fours"], bat["sixes"]),
+        index=bat.index, name="batting_pts"
+    )
 
+    # 2) bowling, under both legality rules
+    legal = d["legal"].to_numpy()
+    dot = d["is_dot"].to_numpy()
+    bowling = _bowling_table(d, legal, dot & legal).set_index(keys)["points"]
+    mvp_bowling = _bowling_table(d, _legal_mask(d), dot).set_index(keys)["points"]
+
+    # 3) fielding
+    kind = d["dismissal_kind"]
+    fld = (
+        pd.DataFrame({
+            "player":   d["fielder"].array,
+            "match_id": d["match_id"].to_numpy(),
+            "c":        (kind == "caught").to_numpy(),
+            "s":        (kind == "stumped").to_numpy(),
+            "r":        (kind == "run out").to_numpy(),
+        })
+        .groupby(keys, observed=True)
+        .sum()
+    )
+    fielding = pd.Series(
+        fielding_points(fld["c"], fld["s"], fld["r"]),
+        index=fld.index, name="fielding_pts"
+    )
 
-def compute_career_average_points(
-    deliveries: pd.DataFrame,
-    matches: pd.DataFrame,
-    player: str,
-    years: str = "all"
-) -> float:
+    # 4) outer-join the three on (player, match), in (player, match) order
+    ledger = pd.concat(
+        [batting, bowling.rename("bowling_pts"), fielding,
+         mvp_bowling.rename("mvp_bowling_pts")],
+        axis=1, sort=True
+    ).astype("float32")
+
+    # 5) season and the player's side in that match
+    side = pd.concat([
+        pd.DataFrame({"player": d["batter"].array, "match_id": d["match_id"].to_numpy(),
+                      "team": d["batting_team"].array}),
+        pd.DataFrame({"player": d["bowler"].array, "match_id": d["match_id"].to_numpy(),
+                      "team": d["bowling_team"].array}),
+        pd.DataFrame({"player": d["fielder"].array, "match_id": d["match_id"].to_numpy(),
+                      "team": d["bowling_team"].array}),
+    ]).dropna(subset=["player"]).drop_duplicates(keys).set_index(keys)["team"]
+    ledger["team"] = side.reindex(ledger.index)
+
+    ledger = ledger.reset_index()
+    season = d.drop_duplicates("match_id").set_index("match_id")["season"]
+    ledger.insert(2, "season", season.reindex(ledger["match_id"]).to_numpy())
+    return ledger[["player", "match_id", "season", "team",
+                   "batting_pts", "bowling_pts", "fielding_pts", "mvp_bowling_pts"]]
+
+
+def compute_match_points(ctx, player: str, years: str = "all") -> dict:
     """
-    Compute career average points per match for `player` over selected years.
+    Compute per‐match points for `player`. Returns { match_id: points }.
     """
-    m = matches.copy()
-    m["season"] = pd.to_datetime(m["date"]).dt.year
-    if years != "all":
-        try:
-            yrs = [int(y) for y in years.split(",")]
-            valid_ids = m[m["season"].isin(yrs)]["id"].tolist()
-        except ValueError:
-            valid_ids = m["id"].tolist()
-    else:
-        valid_ids = m["id"].tolist()
+    led = ctx.ledger_for(years)
+    rows = led[led["player"] == player]
+    total = rows[["batting_pts", "mvp_bowling_pts", "fielding_pts"]].sum(axis=1)
+    return {int(mid): int(p) for mid, p in zip(rows["match_id"], total)}
 
-    deliv = deliveries[deliveries["match_id"].isin(valid_ids)].copy()
-    match_pts = compute_match_points(deliv, player)
+
+def compute_career_average_points(ctx, player: str, years: str = "all") -> float:
+    """
+    Compute career average points per match for `player` over selected years.
+    """
+    match_pts = compute_match_points(ctx, player, years)
     if not match_pts:
         return 0.0
     return sum(match_pts.values()) / len(match_pts)
 
 
-def compute_top25_players(
-    deliveries: pd.DataFrame,
-    matches: pd.DataFrame,
-    years: str = "all"
-) -> pd.DataFrame:
+def compute_top25_players(ctx, years: str = "all") -> pd.DataFrame:
     """
     Bulk version: returns a DataFrame of the top 25 players by career
     average points over the specified seasons. Filters out any player
     who hasn’t played at least half the maximum matches in those years.
     Columns: ['player','avg_points'].
-    """
-    # 1) filter matches by season
-    m = matches.copy()
-    m["season"] = pd.to_datetime(m["date"]).dt.year
-    if years != "all":
-        try:
-            yrs = [int(y) for y in years.split(",")]
-            valid = m[m["season"].isin(yrs)]["id"]
-        except ValueError:
-            valid = m["id"]
-    else:
-        valid = m["id"]
-
-    # 2) restrict deliveries
-    d = deliveries[deliveries["match_id"].isin(valid)].copy()
 
-    # 3) batting subtotals
-    if "batter" in d.columns and "batsman_runs" in d.columns:
-        bat = (
-            d.groupby(["batter", "match_id"])
-             .agg(
-                runs  = ("batsman_runs", "sum"),
-                balls = ("batsman_runs", "count"),
-                fours = ("batsman_runs", lambda x: (x == 4).sum()),
-                sixes = ("batsman_runs", lambda x: (x == 6).sum())
-             )
-             .reset_index()
+    A grouped reduction over the points ledger built at startup.
+    """
+    # 1) restrict the ledger to the selected seasons
+    with span("top25.ledger_for", years=years):
+        led = ctx.ledger_for(years)
+
+    # 2) per-player totals (float64 sums of integer points are exact)
+    with span("top25.groupby", rows=len(led)):
+        per_match = led[["player", "match_id"]].assign(
+            points=led[["batting_pts", "mvp_bowling_pts", "fielding_pts"]]
+                   .astype("float64").sum(axis=1)
         )
-        def _bat_pts(r):
-            runs, balls, fours, sixes = r["runs"], r["balls"], r["fours"], r["sixes"]
-            sr = runs / balls * 100 if balls > 0 else 0
-            pts = runs + fours*4 + sixes*6
-            if runs >= 100:   pts += 16
-            elif runs >= 75:  pts += 12
-            elif runs >= 50:  pts += 8
-            elif runs > 25:   pts += 4
-            if sr > 170:      pts += 6
-            elif sr > 150:    pts += 4
-            elif sr >= 130:   pts += 2
-            elif 60 <= sr < 70: pts -= 2
-            elif 50 <= sr < 60: pts -= 4
-            elif sr < 50:       pts -= 6
-            return pts
-        bat["points"] = bat.apply(_bat_pts, axis=1)
-        bat = bat.rename(columns={"batter": "player"})[["player", "match_id", "points"]]
-    else:
-        bat = pd.DataFrame(columns=["player", "match_id", "points"])
-
-    # 4) bowling subtotals
-    if "bowler" in d.columns and "total_runs" in d.columns:
-        def _bowl_pts(df):
-            noball = df["noball_runs"] if "noball_runs" in df else pd.Series(0, index=df.index)
-            wide   = df["wide_runs"]   if "wide_runs"   in df else pd.Series(0, index=df.index)
-
-            dot = (df["total_runs"]==0).sum()
-            wkt = df["dismissal_kind"].isin(WICKET_KINDS).sum()
-            lbw = df["dismissal_kind"].isin({"lbw","bowled"}).sum()
-            runs_c = df["total_runs"].sum()
-
-            legal = df[(noball==0)&(wide==0)]
-            balls = len(legal)
-            overs = balls/6 if balls > 0 else 0
-
-            mcount = 0
-            if "inning" in df and "over" in df:
-                for (_,o), sub in df.groupby(["inning","over"]):
-                    nb = sub["noball_runs"] if "noball_runs" in sub else pd.Series(0, index=sub.index)
-                    wd = sub["wide_runs"]   if "wide_runs"   in sub else pd.Series(0, index=sub.index)
-                    leg = sub[(nb==0)&(wd==0)]
-                    if len(leg)==6 and leg["total_runs"].sum()==0:
-                        mcount+=1
-
-            pts = dot + wkt*30 + lbw*8 + (4 if wkt==3 else 8 if wkt==4 else 12 if wkt>=5 else 0) + mcount*12
-            rpo = runs_c/overs if overs else float("inf")
-            if rpo < 5:    pts += 6
-            elif rpo < 6:  pts += 4
-            elif rpo < 7:  pts += 2
-            elif rpo > 12: pts -= 6
-            elif rpo > 11: pts -= 4
-            elif rpo > 10: pts -= 2
-            return pts
-
-        bwl = (
-            d.groupby(["bowler","match_id"])
-             .apply(_bowl_pts)
-             .reset_index(name="points")
-        ).rename(columns={"bowler": "player"})
-    else:
-        bwl = pd.DataFrame(columns=["player","match_id","points"])
-
-    # 5) fielding subtotals
-    if "fielder" in d.columns and "dismissal_kind" in d.columns:
-        def _fld_pts(df):
-            c = (df["dismissal_kind"]=="caught").sum()
-            s = (df["dismissal_kind"]=="stumped").sum()
-            r = (df["dismissal_kind"]=="run out").sum()
-            return c*8 + (4 if c>=3 else 0) + s*12 + r*6
-
-        fld = (
-            d.groupby(["fielder","match_id"])
-             .apply(_fld_pts)
-             .reset_index(name="points")
-        ).rename(columns={"fielder": "player"})
-    else:
-        fld = pd.DataFrame(columns=["player","match_id","points"])
-
-    # 6) combine & per‐player aggregation
-    combined = pd.concat([bat,bwl,fld], ignore_index=True)
-    per_match = (
-        combined
-        .groupby(["player","match_id"])["points"]
-        .sum()
-        .reset_index()
-    )
-    per_player = (
-        per_match
-        .groupby("player")
-        .agg(
-          total_pts = ("points","sum"),
-          matches   = ("match_id","nunique")
+        per_player = (
+            per_match
+            .groupby("player", observed=True)
+            .agg(
+              total_pts = ("points","sum"),
+              matches   = ("match_id","size")
+            )
+            .reset_index()
         )
-        .reset_index()
-    )
-    per_player["avg_points"] = (per_player["total_pts"] / per_player["matches"])*(1 + 0.006*per_player["matches"])
+        per_player["avg_points"] = (per_player["total_pts"] / per_player["matches"])*(1 + 0.006*per_player["matches"])
 
-    # 7) filter players by at least half of max matches
-    max_matches = per_player["matches"].max()
-    threshold   = max_matches / 2
-    eligible    = per_player[per_player["matches"] >= threshold]
+    with span("top25.select"):
+        # 3) filter players by at least half of max matches
+        max_matches = per_player["matches"].max()
+        threshold   = max_matches / 2
+        eligible    = per_player[per_player["matches"] >= threshold]
 
-    # 8) return top 25 among eligible
-    return eligible.nlargest(25, "avg_points")[["player","avg_points"]]
+        # 4) return top 25 among eligible
+        return eligible.nlargest(25, "avg_points")[["player","avg_points"]]
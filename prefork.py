@@ -0,0 +1,118 @@
+# prefork.py
+
+import gc
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+
+from werkzeug.serving import make_server
+
+from static_export import YEARS_ROUTES
+
+
+def _listen(host: str, port: int, backlog: int = 128) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    # every worker polls the same socket; whoever loses the race to accept()
+    # gets EAGAIN and goes back to polling instead of blocking
+    sock.setblocking(False)
+    sock.set_inheritable(True)
+    return sock
+
+
+def warm_up(app, environ=None):
+    """
+    Run the all-seasons request of every season-level route once in the
+    master, so lazily built state (pandas hash tables, the result caches)
+    exists before the fork and is shared by every worker. `environ` is
+    added to each request's WSGI environ (reload.py stages a new dataset
+    through it).
+    """
+    client = app.test_client()
+    for route in YEARS_ROUTES:
+        client.get(f"/api/{route}", query_string={"years": "all"}, environ_overrides=environ)
+    client.get("/api/points_table", query_string={"year": "all"}, environ_overrides=environ)
+
+
+def _worker(app, host: str, port: int, fd: int):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    metrics = app.extensions.get("metrics")
+    if metrics is not None:
+        metrics.start_flusher()
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def serve(app, host: str = "127.0.0.1", port: int = 5000, workers: int = 2):
+    """
+    Pre-fork server: the caller has already imported the app (dataset
+    loaded from the memory-mapped snapshot, DataContext and its indexes
+    built); this warms it, freezes the GC and forks `workers` processes
+    that all accept on one listening socket.
+
+    The workers share the master's memory copy-on-write. Snapshot columns
+    are read-only file mappings and the derived numpy buffers are never
+    written, so those pages stay shared; gc.freeze() moves every existing
+    object to the permanent generation so collections in the workers don't
+    write to (and so copy) the pages holding them. Request metrics are
+    shared through a temporary directory so /metrics covers every worker.
+    Dead workers are replaced; SIGINT/SIGTERM stops them all.
+    """
+    sock = _listen(host, port)
+    warm_up(app)
+    metrics = app.extensions.get("metrics")
+    if metrics is not None:
+        metrics.share(tempfile.mkdtemp(prefix="ipl-metrics-"))
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _worker(app, host, port, sock.fileno())
+        children.add(pid)
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f" * master {os.getpid()} serving http://{host}:{port} with {workers} workers",
+          file=sys.stderr)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f" * worker {pid} exited; starting a replacement", file=sys.stderr)
+            spawn()
+    sock.close()
+    if metrics is not None:
+        shutil.rmtree(metrics.directory, ignore_errors=True)
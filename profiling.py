@@ -0,0 +1,204 @@
+# profiling.py
+
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, jsonify, request
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+# hottest frames returned by ?_profile=1 (override with ?_profile_top=N)
+DEFAULT_TOP = 30
+
+# the Tracer collecting spans for the current request, if any
+_request_tracer = ContextVar("request_tracer", default=None)
+# the process-wide Tracer when IPL_TRACE_FILE is set
+_process_tracer = None
+
+
+class Tracer:
+    """Completed spans as Chrome trace-event "X" (complete) events."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: dict):
+        event = {
+            "name": name, "cat": "ipl", "ph": "X",
+            "ts":   start_ns / 1e3, "dur": (end_ns - start_ns) / 1e3,
+            "pid":  os.getpid(), "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def chrome_trace(self) -> dict:
+        """The trace-event JSON that chrome://tracing and Perfetto load."""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str):
+        with open(path, "w") as fh:
+            json.dump(self.chrome_trace(), fh)
+
+
+class _Span:
+    __slots__ = ("tracers", "name", "args", "start")
+
+    def __init__(self, tracers, name, args):
+        self.tracers = tracers
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        for tracer in self.tracers:
+            tracer.add(self.name, self.start, end, self.args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **args):
+    """
+    `with span("stage"):` times a named stage of a computation. Recorded
+    only while a profiled request (?_profile=...) or the process trace
+    (IPL_TRACE_FILE) is active; otherwise it is a shared no-op object,
+    cheap enough to leave in hot functions.
+    """
+    current = _request_tracer.get()
+    if current is None and _process_tracer is None:
+        return _NO_SPAN
+    tracers = [t for t in (current, _process_tracer) if t is not None]
+    return _Span(tracers, name, args)
+
+
+def start_process_trace(path: str):
+    """
+    Record every span in this process, startup included, and write them to
+    `path` as a Chrome trace when the interpreter exits.
+    """
+    global _process_tracer
+    if _process_tracer is None:
+        _process_tracer = Tracer()
+        atexit.register(_process_tracer.write, path)
+
+
+def _frame_name(filename: str, line: int, func: str) -> str:
+    if filename == "~":
+        return func   # built-in
+    if filename.startswith(BASE + os.sep):
+        filename = os.path.relpath(filename, BASE)
+    else:
+        filename = os.sep.join(filename.split(os.sep)[-2:])
+    return f"{filename}:{line}({func})"
+
+
+def hot_frames(profiler: cProfile.Profile, top: int) -> list:
+    """The `top` frames by cumulative time, as JSON-ready rows."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+    return [
+        {
+            "function":    _frame_name(*key),
+            "calls":       nc,
+            "primitive":   cc,
+            "tottime_ms":  round(tt * 1e3, 3),
+            "cumtime_ms":  round(ct * 1e3, 3),
+        }
+        for key, (cc, nc, tt, ct, _) in rows
+    ]
+
+
+def register_profiling(app):
+    """
+    Admin-only request profiling. A request carrying ?_profile=1 and an
+    X-Admin-Token header equal to ADMIN_TOKEN runs its view under cProfile
+    (result cache bypassed) and gets back, instead of the usual body:
+      - the view's status, response size and wall time,
+      - the hottest frames by cumulative time,
+      - the span() stages it passed through.
+    ?_profile=trace returns the spans as a Chrome trace-event JSON file.
+    Without ADMIN_TOKEN configured, ?_profile is refused with 403.
+
+    Register this right after metrics, before the HTTP/static caches, so a
+    profiled request is never answered from them.
+    """
+    # imported here: the data modules import span() from this module
+    from admin import is_admin
+    from http_cache import no_store
+
+    app.config.setdefault("ADMIN_TOKEN", None)
+
+    @app.before_request
+    def profile_request():
+        mode = request.args.get("_profile")
+        if mode is None:
+            return None
+        if not is_admin():
+            return jsonify({"error": "Profiling requires a valid X-Admin-Token"}), 403
+        if request.url_rule is None:
+            return None   # let routing produce its 404/405
+
+        g.profiling = True
+        no_store()
+        view = app.view_functions[request.endpoint]
+        tracer = Tracer()
+        profiler = cProfile.Profile()
+        reset = _request_tracer.set(tracer)
+        start = time.perf_counter()
+        try:
+            with span(f"{request.method} {request.url_rule.rule}"):
+                response = app.make_response(profiler.runcall(view, **request.view_args))
+        finally:
+            _request_tracer.reset(reset)
+        wall = time.perf_counter() - start
+
+        if mode == "trace":
+            return app.response_class(
+                json.dumps(tracer.chrome_trace()), mimetype="application/json",
+                headers={"Content-Disposition":
+                         f'attachment; filename="{request.endpoint}.trace.json"'},
+            )
+        try:
+            top = max(1, int(request.args.get("_profile_top", DEFAULT_TOP)))
+        except ValueError:
+            top = DEFAULT_TOP
+        events = tracer.chrome_trace()["traceEvents"]
+        base_ts = events[0]["ts"] if events else 0
+        return jsonify({
+            "endpoint": request.endpoint,
+            "status":   response.status_code,
+            "bytes":    response.content_length or 0,
+            "wall_ms":  round(wall * 1e3, 3),
+            "hot":      hot_frames(profiler, top),
+            "spans": [
+                {"name": e["name"], "start_ms": round((e["ts"] - base_ts) / 1e3, 3),
+                 "ms": round(e["dur"] / 1e3, 3), **e.get("args", {})}
+                for e in events
+            ],
+        })
@@ -0,0 +1,123 @@
+# reload.py
+
+import sys
+import threading
+import time
+import weakref
+
+from flask import jsonify, request
+
+from admin import is_admin
+from data_handle import STAGED
+from datastore import DataContext
+from ingest import csv_stats, request_reload, reload_requested
+from prefork import warm_up
+from result_cache import CacheRegistry
+from snapshot import load_dataset
+
+
+def _released(version: str):
+    print(f" * dataset {version[:12]} released", file=sys.stderr)
+
+
+class Reloader:
+    """
+    Rebuilds the whole dataset from the CSVs in a background thread while
+    the current one keeps serving: load (snapshot or CSV parse), a new
+    DataContext with all its indexes, and fresh result caches warmed with
+    the all-seasons requests (prefork.warm_up, run against the staged
+    pair). Only then are context and caches swapped in through the
+    DataHandle, in one assignment. Requests already running finish on
+    the old context, which is freed when the last of them ends.
+
+    A failed rebuild is logged and the current data keeps serving.
+    """
+
+    def __init__(self, app, handle, data_dir: str, use_snapshot: bool, ingestor=None):
+        self.app = app
+        self.handle = handle
+        self.data_dir = data_dir
+        self.use_snapshot = use_snapshot
+        self.ingestor = ingestor
+        self.last = None    # summary of the last finished reload
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Start a rebuild unless one is running; True when one started."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.run, name="data-reload", daemon=True)
+            self._thread.start()
+            return True
+
+    def join(self, timeout: float = None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def run(self):
+        # the lock keeps ingest from applying rows to the context being replaced
+        with self.handle.lock:
+            start = time.perf_counter()
+            try:
+                stats = csv_stats(self.data_dir)
+                matches, deliveries, version = load_dataset(self.data_dir, self.use_snapshot)
+                ctx = DataContext(matches, deliveries, version)
+                caches = CacheRegistry(self.app.config["RESULT_CACHE_MAX_BYTES"])
+                warm_up(self.app, {STAGED: (ctx, caches)})
+            except Exception as e:
+                print(f" * reload failed, still serving {self.handle.ctx.version[:12]}: {e!r}",
+                      file=sys.stderr)
+                return
+
+            old = self.handle.swap(ctx, caches)
+            self.app.extensions["result_cache"] = caches
+            if self.ingestor is not None:
+                self.ingestor.rebase(stats, version)
+            weakref.finalize(old, _released, old.version)
+            del old
+
+        self.last = {
+            "version":    version,
+            "matches":    len(ctx.matches),
+            "deliveries": len(ctx.deliveries),
+            "seconds":    round(time.perf_counter() - start, 2),
+        }
+        print(f" * reloaded dataset {version[:12]} in {self.last['seconds']}s", file=sys.stderr)
+
+
+def register_reload(app, handle, data_dir: str, use_snapshot: bool) -> Reloader:
+    """
+    Full reloads without a restart. A rebuild (see Reloader) starts when:
+      - the ingest poll finds a CSV replaced, edited or truncated rather
+        than appended to
+      - RELOAD_FILE in the data dir is touched (`manage.py reload`), which
+        reaches every worker of a pre-fork server
+      - POST /api/admin/reload (X-Admin-Token required) is called; it
+        touches RELOAD_FILE too, and with ?wait=1 answers once this
+        process has swapped
+    Register this after register_ingest and register_result_cache.
+    """
+    ingestor = app.extensions.get("ingest")
+    reloader = Reloader(app, handle, data_dir, use_snapshot, ingestor)
+    app.extensions["reload"] = reloader
+    if ingestor is not None:
+        ingestor.reloader = reloader
+
+    @app.route("/api/admin/reload", methods=["POST"])
+    def admin_reload():
+        if not is_admin():
+            return jsonify({"error": "Reload requires a valid X-Admin-Token"}), 403
+        request_reload(data_dir)
+        if ingestor is not None:
+            # this process starts now; its next poll shouldn't start again
+            ingestor.trigger = reload_requested(data_dir)
+        started = reloader.start()
+        if request.args.get("wait") == "1":
+            reloader.join()
+            return jsonify(reloader.last or {})
+        return jsonify({"started": started, "version": handle.ctx.version}), 202
+
+    return reloader
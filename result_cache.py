@@ -0,0 +1,285 @@
+# result_cache.py
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+from datastore import canonical_years
+from http_cache import no_store
+
+# default memory budget per endpoint (bytes of cached response bodies)
+DEFAULT_MAX_BYTES = 4 << 20
+
+# rough per-entry bookkeeping cost (key, heap slot, entry object)
+ENTRY_OVERHEAD = 256
+
+
+class _Entry:
+    __slots__ = ("value", "size", "cost", "priority", "seq")
+
+
+class ResultCache:
+    """
+    A memory-bounded cache with GreedyDual-Size eviction: each entry's
+    priority is clock + cost / size, refreshed on every hit, and the lowest
+    priority entry is evicted first (the clock then advances to it). With
+    equal cost per byte this is plain LRU; otherwise a large, cheap result
+    goes before a small one that took long to compute, so the same memory
+    holds more of the work worth keeping.
+    `cost` is the compute time in seconds, `size` the bytes kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, season_scoped: bool = True):
+        self.max_bytes = max_bytes
+        self.season_scoped = season_scoped
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = {}
+        self._heap = []   # (priority, seq, key); stale rows skipped on pop
+        self._clock = 0.0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The cached value for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._push(key, entry)
+            return entry.value
+
+    def put(self, key, value, size: int, cost: float, valid=None):
+        """
+        Store `value`, evicting as needed; values over budget are skipped,
+        and so are values for which `valid()` (checked under the lock, so
+        no discard() can run between the check and the store) is false.
+        """
+        size = max(int(size), 1)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if valid is not None and not valid():
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            while self._entries and self.bytes + size > self.max_bytes:
+                self._evict_one()
+
+            entry = _Entry()
+            entry.value, entry.size, entry.cost = value, size, cost
+            self._entries[key] = entry
+            self.bytes += size
+            self._push(key, entry)
+
+    def discard(self, predicate) -> int:
+        """Drop every entry whose key satisfies `predicate`; returns the count."""
+        with self._lock:
+            doomed = [k for k in self._entries if predicate(k)]
+            for key in doomed:
+                self.bytes -= self._entries.pop(key).size
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+                "hit_rate":  round(self.hits / lookups, 4) if lookups else None,
+                "entries":   len(self._entries),
+                "bytes":     self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _push(self, key, entry):
+        entry.priority = self._clock + entry.cost / entry.size
+        entry.seq = next(self._seq)
+        heapq.heappush(self._heap, (entry.priority, entry.seq, key))
+        # hits leave stale heap rows behind; compact before they pile up
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._heap = [(e.priority, e.seq, k) for k, e in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _evict_one(self):
+        while self._heap:
+            priority, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.seq == seq:
+                del self._entries[key]
+                self.bytes -= entry.size
+                self._clock = priority
+                self.evictions += 1
+                return
+
+
+class CacheRegistry:
+    """
+    One ResultCache per endpoint, each with the same byte budget.
+
+    `generation` goes up by two per invalidation: it is odd while one is
+    under way (the data is being swapped and stale entries dropped) and
+    even otherwise. A request records the generation when it is pinned to
+    its DataContext (data_handle.py); if that is odd, or no longer
+    current, the request's context and these caches may disagree, so it
+    neither reads nor stores results (see cached()).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.caches = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def for_endpoint(self, endpoint: str, season_scoped: bool = True) -> ResultCache:
+        cache = self.caches.get(endpoint)
+        if cache is None:
+            with self._lock:
+                cache = self.caches.setdefault(endpoint, ResultCache(self.max_bytes, season_scoped))
+        return cache
+
+    def invalidate(self, seasons=None) -> int:
+        """
+        Drop cached results that depend on any of `seasons` (every result
+        when None). Results keyed to all seasons always go, and so does
+        everything cached by endpoints that aren't season-scoped.
+        """
+        with self.invalidating(seasons) as dropped:
+            pass
+        return dropped[0]
+
+    @contextmanager
+    def invalidating(self, seasons=None):
+        """
+        invalidate(seasons) around the body, which swaps in the data the
+        caches must now agree with:
+
+            with registry.invalidating(seasons):
+                handle.swap(new_ctx)
+
+        Requests pinned before the end bypass the caches, whichever
+        context they got. Yields a one-item list: the count dropped.
+        """
+        dropped = [0]
+        with self._lock:
+            self.generation += 1
+        try:
+            yield dropped
+        finally:
+            dropped[0] = self._discard(seasons)
+            with self._lock:
+                self.generation += 1
+
+    def _discard(self, seasons) -> int:
+        seasons = None if seasons is None else frozenset(seasons)
+
+        def stale(key):
+            return seasons is None or key[0] is None or not key[0].isdisjoint(seasons)
+
+        return sum(
+            cache.discard(stale if cache.season_scoped else lambda key: True)
+            for cache in list(self.caches.values())
+        )
+
+    def stats(self) -> dict:
+        return {name: cache.stats() for name, cache in sorted(self.caches.items())}
+
+
+def request_key(args) -> tuple:
+    """
+    Cache key for a query string: (seasons, other params). `seasons` is the
+    canonical ?years= (or ?year=) frozenset, None for all seasons, so
+    equivalent spellings share an entry and invalidation can tell which
+    seasons a result depends on. Other params keep their first value, as
+    the routes read them with request.args.get.
+    """
+    seasons = canonical_years(args.get("years", "all"))
+    year = args.get("year")
+    if year is not None:
+        seasons = canonical_years(year)
+    rest = tuple(sorted((k, v) for k, v in args.items() if k != "years"))
+    return seasons, rest
+
+
+def cached(view=None, *, season_scoped: bool = True):
+    """
+    Memoize a GET view's successful response body in its endpoint's
+    ResultCache, keyed by request_key(). The registry is the one pinned
+    to the request with its DataContext (data_handle.py), else the app's;
+    requests pinned to a generation that has since moved on (see
+    CacheRegistry) run the view and store nothing. Views that call
+    http_cache.no_store() are never cached; profiled requests
+    (profiling.py) always run the view.
+
+    Use @cached(season_scoped=False) for views whose results for some
+    seasons can still change with data from others (e.g. player names are
+    resolved by career match counts): any invalidation drops them.
+    """
+    if view is None:
+        return lambda view: cached(view, season_scoped=season_scoped)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        registry = g.get("result_cache")
+        generation = g.get("cache_generation")
+        if registry is None:
+            registry = current_app.extensions.get("result_cache")
+            generation = registry.generation if registry is not None else None
+        if registry is None or g.get("profiling"):
+            return view(*args, **kwargs)
+
+        def current():
+            return generation == registry.generation and generation % 2 == 0
+
+        if not current():
+            return view(*args, **kwargs)
+
+        cache = registry.for_endpoint(request.endpoint, season_scoped)
+        key = request_key(request.args)
+        hit = cache.get(key)
+        if hit is not None:
+            body, mimetype = hit
+            return current_app.response_class(body, mimetype=mimetype)
+
+        start = time.perf_counter()
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not g.get("http_no_store"):
+            body = response.get_data()
+            cache.put(key, (body, response.mimetype),
+                      len(body) + ENTRY_OVERHEAD, time.perf_counter() - start, current)
+        return response
+
+    return wrapper
+
+
+def register_result_cache(app):
+    """
+    Install the per-endpoint result caches (RESULT_CACHE_MAX_BYTES each)
+    and GET /api/cache_stats with their hit/miss/eviction counters.
+    """
+    app.config.setdefault("RESULT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    registry = CacheRegistry(app.config["RESULT_CACHE_MAX_BYTES"])
+    app.extensions["result_cache"] = registry
+
+    @app.route("/api/cache_stats")
+    def cache_stats():
+        # live counters: never cached; reload.py may have replaced the registry
+        no_store()
+        return jsonify(app.extensions["result_cache"].stats())
+
+    return registry
@@ -1,106 +1,54 @@
 # season_stats.py
 from flask import request, jsonify
+from leaderboard import leaderboard
+from result_cache import cached
 
-def register_routes(app, matches, deliveries):
-    # Build match_id → season map
-    match_season = dict(zip(matches["id"], matches["date"].dt.year))
-
-    # Annotate every delivery with its season
-    df_all = deliveries.copy()
-    df_all["season"] = df_all["match_id"].map(match_season)
-
-    # Annotate matches with season
-    matches_all = matches.copy()
-    matches_all["season"] = matches_all["date"].dt.year
-
-    # Which dismissal kinds count as bowler-credited wickets?
-    BOWLER_DISMISSALS = {
-        "bowled", "caught", "lbw", "stumped",
-        "caught and bowled", "hit wicket"
-    }
-
-    def _filter_by_season(df, years_param, season_col="season"):
-        """Return only rows whose season is in years_param or all if 'all'."""
-        if years_param == "all":
-            return df
-        try:
-            years = [int(y) for y in years_param.split(",")]
-            return df[df[season_col].isin(years)]
-        except ValueError:
-            return df
+def register_routes(app, ctx):
+    # the leaderboards below come from the leaderboard engine, which sums
+    # the per-(player, season, team) cube, so their cost doesn't depend on
+    # the number of deliveries
 
     @app.route("/api/orange_cap")
+    @cached
     def orange_cap():
         years = request.args.get("years", "all")
-        df = _filter_by_season(df_all, years)
-        top = (
-            df.groupby("batter")["batsman_runs"]
-              .sum()
-              .nlargest(1)
-              .reset_index(name="total_runs")
-        )
-        return jsonify(top.to_dict(orient="records"))
+        top = leaderboard(ctx, "runs", 1, years)
+        return jsonify(top[["player", "runs"]].rename(
+            columns={"player": "batter", "runs": "total_runs"}))
 
     @app.route("/api/purple_cap")
+    @cached
     def purple_cap():
         years = request.args.get("years", "all")
-        df_wk = df_all[df_all["dismissal_kind"].isin(BOWLER_DISMISSALS)]
-        df_wk = _filter_by_season(df_wk, years)
-        top = (
-            df_wk.groupby("bowler")["dismissal_kind"]
-                 .count()
-                 .nlargest(1)
-                 .reset_index(name="wickets")
-        )
-        return jsonify(top.to_dict(orient="records"))
+        top = leaderboard(ctx, "wickets", 1, years)
+        return jsonify(top[["player", "wickets"]].rename(columns={"player": "bowler"}))
 
     @app.route("/api/batsmen_scatter_data")
+    @cached
     def batsmen_scatter_data():
         years = request.args.get("years", "all")
-        df = _filter_by_season(df_all, years)
-        df["is_six"] = (df["batsman_runs"] == 6).astype(int)
-        df["is_four"] = (df["batsman_runs"] == 4).astype(int)
+        top = leaderboard(ctx, "runs", 50, years, columns=["sixes", "fours"])
         agg = (
-            df.groupby("batter")
-              .agg(
-                  runs        = ("batsman_runs", "sum"),
-                  balls       = ("ball", "count"),
-                  sixes       = ("is_six", "sum"),
-                  fours       = ("is_four", "sum"),
-              )
-              .assign(strike_rate=lambda d: d["runs"] / d["balls"] * 100)
-              .nlargest(50, "runs")
-              .reset_index()[["batter", "runs", "strike_rate", "sixes", "fours"]]
+            top.assign(strike_rate=top["runs"] / top["balls"] * 100)
+               .rename(columns={"player": "batter"})
+               [["batter", "runs", "strike_rate", "sixes", "fours"]]
         )
-        return jsonify(agg.to_dict(orient="records"))
+        return jsonify(agg)
 
     @app.route("/api/bowlers_scatter_data")
+    @cached
     def bowlers_scatter_data():
         years = request.args.get("years", "all")
-        df_season = _filter_by_season(df_all, years)
-        df_wk = df_season[df_season["dismissal_kind"].isin(BOWLER_DISMISSALS)]
-        wicket_counts = df_wk.groupby("bowler")["dismissal_kind"].count()
-        top_bowlers = wicket_counts.nlargest(50).index.tolist()
-
-        # mark dot balls: total_runs == 0
-        df_season["is_dot"] = (df_season["total_runs"] == 0).astype(int)
-
-        sub = df_season[df_season["bowler"].isin(top_bowlers)]
-        agg = (
-            sub.groupby("bowler")
-               .agg(
-                   wickets        = ("dismissal_kind", lambda s: s.isin(BOWLER_DISMISSALS).sum()),
-                   runs_conceded  = ("total_runs", "sum"),
-                   balls          = ("ball", "count"),
-                   dot_balls      = ("is_dot", "sum")
-               )
+        top = leaderboard(ctx, "wickets", 50, years, columns=["runs_conceded", "dots"])
+        result = (
+            top.assign(economy_rate=top["runs_conceded"] * 6 / top["bowl_balls"])
+               .rename(columns={"player": "bowler", "dots": "dot_balls"})
+               [["bowler", "wickets", "economy_rate", "dot_balls"]]
         )
-        agg["economy_rate"] = agg["runs_conceded"] * 6 / agg["balls"]
-        agg = agg.loc[top_bowlers]
-        result = agg.reset_index()[["bowler", "wickets", "economy_rate", "dot_balls"]]
-        return jsonify(result.to_dict(orient="records"))
+        return jsonify(result)
 
     @app.route("/api/season_summary")
+    @cached
     def season_summary():
         """
         Returns overall season metrics for the selected season(s):
@@ -112,13 +60,12 @@ def register_routes(app, matches, deliveries):
         """
         years = request.args.get("years", "all")
         # filter deliveries & matches
-        df = _filter_by_season(df_all, years)
-        matches_df = _filter_by_season(matches_all, years, season_col="season")
+        df = ctx.deliveries_for(years)
 
         # total sixes, fours, dot balls
-        total_sixes     = int((df["batsman_runs"] == 6).sum())
-        total_fours     = int((df["batsman_runs"] == 4).sum())
-        total_dot_balls = int((df["total_runs"] == 0).sum())
+        total_sixes     = int(df["is_six"].sum())
+        total_fours     = int(df["is_four"].sum())
+        total_dot_balls = int(df["is_dot"].sum())
 
         # avg innings score: group by match_id & inning
         innings_scores = (
@@ -128,7 +75,7 @@ def register_routes(app, matches, deliveries):
         avg_innings_score = float(innings_scores.mean())
 
         # avg wickets per match: count bowler-credited dismissals per match
-        df_wk = df[df["dismissal_kind"].isin(BOWLER_DISMISSALS)]
+        df_wk = df[df["bowler_wicket"]]
         wickets_per_match = df_wk.groupby("match_id")["dismissal_kind"].count()
         avg_wickets_per_match = float(wickets_per_match.mean())
 
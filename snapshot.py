@@ -0,0 +1,214 @@
+# snapshot.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_frames
+
+# bump whenever the on-disk layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+CSV_FILES = {
+    "matches":    "matches.csv",
+    "deliveries": "deliveries.csv",
+}
+
+# a Cricsheet download (per-match JSON, zipped or not) that a data dir
+# without the CSVs is loaded from instead (cricsheet.py)
+CRICSHEET_SOURCES = ("cricsheet.zip", "cricsheet")
+
+
+def content_hash(*paths: str) -> str:
+    """Hash the raw bytes of the given files (plus the snapshot layout version)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"snapshot-v{SNAPSHOT_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+# pd.read_csv options per file; also used for rows appended later (ingest.py)
+READ_OPTIONS = {
+    "matches":    {"parse_dates": ["date"]},
+    "deliveries": {},
+}
+
+
+def read_csvs(data_dir: str):
+    """Parse the raw CSVs exactly the way the app always has."""
+    matches = pd.read_csv(os.path.join(data_dir, CSV_FILES["matches"]), **READ_OPTIONS["matches"])
+    deliveries = pd.read_csv(os.path.join(data_dir, CSV_FILES["deliveries"]),
+                             **READ_OPTIONS["deliveries"])
+    return matches, deliveries
+
+
+def write_snapshot(directory: str, frames: dict):
+    """
+    Write each DataFrame in `frames` as one .npy file per column plus a
+    meta.json describing how to rebuild it:
+      - numeric columns are stored as-is
+      - datetime columns are stored as int64 nanoseconds
+      - categorical columns store their codes; columns sharing a
+        CategoricalDtype share one dictionary in meta.json
+      - other string columns are dictionary-encoded (int32 codes + list)
+    The directory is written under a temp name and renamed into place, so
+    concurrent workers never see a half-written snapshot.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+
+    meta = {"version": SNAPSHOT_VERSION, "dictionaries": {}, "frames": {}}
+    seen_dtypes = []
+    for name, df in frames.items():
+        os.makedirs(os.path.join(tmp, name))
+        columns = []
+        for i, col in enumerate(df.columns):
+            fname = f"{i:03d}.npy"
+            s = df[col]
+            spec = {"name": col, "file": fname}
+            if pd.api.types.is_datetime64_any_dtype(s):
+                spec["kind"] = "datetime"
+                spec["dtype"] = str(s.dtype)
+                arr = s.to_numpy().view("int64")
+            elif isinstance(s.dtype, pd.CategoricalDtype):
+                if s.dtype not in seen_dtypes:
+                    seen_dtypes.append(s.dtype)
+                    meta["dictionaries"][f"d{len(seen_dtypes) - 1}"] = list(s.dtype.categories)
+                spec["kind"] = "category"
+                spec["dictionary"] = f"d{seen_dtypes.index(s.dtype)}"
+                arr = s.cat.codes.to_numpy()
+            elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+                spec["kind"] = "numeric"
+                arr = s.to_numpy()
+            else:
+                codes, cats = pd.factorize(s, use_na_sentinel=True)
+                spec["kind"] = "string"
+                spec["categories"] = [str(c) for c in cats]
+                arr = codes.astype("int32")
+            np.save(os.path.join(tmp, name, fname), np.ascontiguousarray(arr))
+            columns.append(spec)
+        meta["frames"][name] = {"rows": len(df), "columns": columns}
+
+    with open(os.path.join(tmp, "meta.json"), "w") as fh:
+        json.dump(meta, fh)
+
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        # another process finished the same snapshot first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def read_snapshot(directory: str, mmap: bool = True) -> dict:
+    """
+    Rebuild the DataFrames written by `write_snapshot`. Numeric columns are
+    memory-mapped read-only and wrapped without copying; categorical columns
+    get back one shared dtype per dictionary.
+    """
+    with open(os.path.join(directory, "meta.json")) as fh:
+        meta = json.load(fh)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version in {directory}")
+
+    dtypes = {
+        name: pd.CategoricalDtype(cats)
+        for name, cats in meta.get("dictionaries", {}).items()
+    }
+    mode = "r" if mmap else None
+    frames = {}
+    for name, fmeta in meta["frames"].items():
+        data = {}
+        for spec in fmeta["columns"]:
+            arr = np.load(os.path.join(directory, name, spec["file"]), mmap_mode=mode)
+            # plain ndarray view over the mapping: no copy, no memmap subclass
+            arr = arr.view(np.ndarray)
+            if spec["kind"] == "datetime":
+                data[spec["name"]] = arr.view(spec["dtype"])
+            elif spec["kind"] == "category":
+                data[spec["name"]] = pd.Categorical.from_codes(
+                    arr, dtype=dtypes[spec["dictionary"]]
+                )
+            elif spec["kind"] == "string":
+                # trailing NaN so that the -1 sentinel maps to a missing value
+                lookup = np.array(spec["categories"] + [np.nan], dtype=object)
+                data[spec["name"]] = lookup[arr]
+            else:
+                data[spec["name"]] = arr
+        frames[name] = pd.DataFrame(data, copy=False)
+    return frames
+
+
+def cricsheet_source(data_dir: str):
+    """The Cricsheet download to load `data_dir` from, or None for its CSVs."""
+    if os.path.exists(os.path.join(data_dir, CSV_FILES["matches"])):
+        return None
+    for name in CRICSHEET_SOURCES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _prune(root: str, keep: str):
+    for entry in os.listdir(root):
+        # leave other workers' in-progress writes alone
+        if entry != keep and not entry.startswith(".tmp-"):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def load_dataset(data_dir: str, use_snapshot: bool = True):
+    """
+    Load compacted (matches, deliveries, version) for `data_dir`.
+
+    `version` is the content hash of the source CSVs. With `use_snapshot`,
+    the first boot parses the CSVs and writes data/snapshot/<version>/;
+    every later boot with unchanged CSVs memory-maps that snapshot instead.
+    A data dir holding a Cricsheet download instead of the CSVs (see
+    cricsheet_source) is parsed and hashed from that.
+    """
+    source = cricsheet_source(data_dir)
+    if source is not None:
+        from cricsheet import load_cricsheet, source_files
+        paths = [source] if not os.path.isdir(source) else [
+            os.path.join(source, name) for name in source_files(source)]
+
+        def parse():
+            return load_cricsheet(source)
+    else:
+        paths = [os.path.join(data_dir, CSV_FILES[k]) for k in ("matches", "deliveries")]
+
+        def parse():
+            return compact_frames(*read_csvs(data_dir))
+
+    version = content_hash(*paths)
+    if not use_snapshot:
+        matches, deliveries = parse()
+        return matches, deliveries, version
+
+    root = os.path.join(data_dir, "snapshot")
+    directory = os.path.join(root, version)
+    if os.path.isdir(directory):
+        try:
+            frames = read_snapshot(directory)
+            return frames["matches"], frames["deliveries"], version
+        except (OSError, ValueError, KeyError):
+            # corrupt or stale layout → rebuild below
+            shutil.rmtree(directory, ignore_errors=True)
+
+    matches, deliveries = parse()
+    try:
+        write_snapshot(directory, {"matches": matches, "deliveries": deliveries})
+        _prune(root, keep=version)
+    except OSError:
+        # read-only deploys just keep serving from the parsed CSVs
+        pass
+    return matches, deliveries, version
@@ -0,0 +1,154 @@
+# static_export.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from flask import request, send_file
+
+from http_cache import canonical_params
+
+# routes whose only parameter is ?years=
+YEARS_ROUTES = (
+    "top_batsmen", "top_bowlers", "top_fielders",
+    "orange_cap", "purple_cap", "batsmen_scatter_data", "bowlers_scatter_data",
+    "season_summary", "team_wins", "team_winners", "wordcloud",
+)
+
+# routes taking ?team= plus ?years=
+TEAM_ROUTES = ("team_stats", "team_overview")
+
+MANIFEST = "manifest.json"
+
+
+def source_hash() -> str:
+    """
+    Hash of the app's Python sources, so an export made by different code
+    (same data, changed route logic) is never served.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.blake2b(digest_size=8)
+    for name in sorted(os.listdir(here)):
+        if name.endswith(".py"):
+            with open(os.path.join(here, name), "rb") as fh:
+                h.update(name.encode())
+                h.update(fh.read())
+    return h.hexdigest()
+
+
+def export_requests(ctx):
+    """
+    Every (path, params) the export renders: the ?years= routes and the
+    per-team routes for years=all and each single season, and the points
+    table for year=all and each season.
+    """
+    seasons = ["all"] + [str(y) for y in ctx.seasons]
+    teams = sorted(set(ctx.matches["team1"].dropna()) | set(ctx.matches["team2"].dropna()))
+    for route in YEARS_ROUTES:
+        for y in seasons:
+            yield f"/api/{route}", {"years": y}
+    for route in TEAM_ROUTES:
+        for team in teams:
+            for y in seasons:
+                yield f"/api/{route}", {"team": team, "years": y}
+    for y in seasons:
+        yield "/api/points_table", {"year": y}
+
+
+def _file_name(path: str, params: dict) -> str:
+    """api/<route>/<canonical query>.json, with the query percent-encoded."""
+    query = canonical_params(params)
+    return f"{path.strip('/')}/{quote(query, safe='=,&')}.json"
+
+
+def export_static(app, ctx, out_dir: str) -> dict:
+    """
+    Render every export_requests() response through the app and write them
+    to <out_dir>/<ctx.version>/, plus <out_dir>/manifest.json mapping
+    "<path>?<canonical query>" to the file. The version directory is built
+    under a temporary name and renamed into place; older versions are
+    removed. Only 200 responses are exported. Returns the manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=out_dir)
+    client = app.test_client()
+    files = {}
+    for path, params in export_requests(ctx):
+        response = client.get(path, query_string=params)
+        if response.status_code != 200:
+            continue
+        name = _file_name(path, params)
+        target = os.path.join(tmp, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as fh:
+            fh.write(response.get_data())
+        files[f"{path}?{canonical_params(params)}"] = f"{ctx.version}/{name}"
+
+    directory = os.path.join(out_dir, ctx.version)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp, directory)
+
+    manifest = {
+        "version":   ctx.version,
+        "source":    source_hash(),
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files":     files,
+    }
+    with open(os.path.join(out_dir, MANIFEST + ".tmp"), "w") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(os.path.join(out_dir, MANIFEST + ".tmp"), os.path.join(out_dir, MANIFEST))
+
+    for entry in os.listdir(out_dir):
+        if entry not in (ctx.version, MANIFEST) and not entry.startswith(".tmp-"):
+            shutil.rmtree(os.path.join(out_dir, entry), ignore_errors=True)
+    return manifest
+
+
+def load_manifest(out_dir: str, version: str) -> dict:
+    """
+    The exported files for `version` ({} if missing, or exported for another
+    data version or by different code).
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != version or manifest.get("source") != source_hash():
+        return {}
+    return manifest.get("files", {})
+
+
+def register_static_api(app, ctx, out_dir: str):
+    """
+    Serve exported responses straight from disk: a GET whose path and
+    canonical query are in the current manifest (see load_manifest) is
+    answered with the file, without running the view. Anything else (or a
+    stale export) falls through to the live route, and so does everything
+    once the data has moved on from the exported version (ingest.py).
+    """
+    version = ctx.version
+    files = load_manifest(out_dir, version)
+    if not files:
+        return
+    paths = {key.split("?", 1)[0] for key in files}
+
+    @app.before_request
+    def serve_exported():
+        if request.method not in ("GET", "HEAD") or request.path not in paths:
+            return None
+        if ctx.version != version:
+            return None
+        name = files.get(f"{request.path}?{canonical_params(request.args)}")
+        if name is None:
+            return None
+        try:
+            return send_file(os.path.join(out_dir, name), mimetype="application/json",
+                             conditional=False, etag=False,
+                             max_age=app.config.get("API_CACHE_MAX_AGE"))
+        except OSError:
+            return None
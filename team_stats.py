@@ -2,46 +2,32 @@
 
 import pandas as pd
 from flask import request, jsonify
+from datastore import canonical_years, years_label
+from profiling import span
+from result_cache import cached
 
-# dismissal kinds that count as wickets
-WICKET_KINDS = {
-    "bowled", "caught", "lbw", "stumped",
-    "caught and bowled", "hit wicket"
-}
 
-def register_team_stats_routes(app,
-                              matches: pd.DataFrame,
-                              deliveries: pd.DataFrame):
+def register_team_stats_routes(app, ctx):
     """
     Registers:
       - GET /api/team_stats
       - GET /api/team_stats_compare
       - GET /api/team_vs_team
-      - GET /api/team_overview
+      - GET /api/team_overview (its "years" field is the canonical
+        spelling of ?years=, e.g. "2008,2009", and "all" for all seasons
+        or anything unreadable; not the raw parameter)
 
     Also prints the list of all distinct teams from matches.csv to the console.
     """
 
-    # 1) Tag each match with its season
-    df_all = matches.copy()
-    df_all["season"] = df_all["date"].dt.year
-
     # --- new: print distinct team names ---
+    df_all = ctx.matches
     all_teams = sorted(set(df_all["team1"]).union(df_all["team2"]))
     print("Unique teams in matches.csv:", all_teams)
 
-    def _filter_by_years(df: pd.DataFrame, years_param: str):
-        if years_param != "all":
-            try:
-                yrs = [int(y) for y in years_param.split(",")]
-                return df[df["season"].isin(yrs)]
-            except ValueError:
-                pass
-        return df
-
     # 2) Compute overall / home / away stats for one team
     def _compute_stats_for(team: str, years: str):
-        df = _filter_by_years(df_all, years)
+        df = ctx.matches_for(years)
         df_team = df[(df["team1"] == team) | (df["team2"] == team)]
         if df_team.empty:
             return None
@@ -73,7 +59,7 @@ def register_team_stats_routes(app,
 
     # 4) Head-to-head between two teams
     def _compute_head2head(teamA: str, teamB: str, years: str):
-        df = _filter_by_years(df_all, years)
+        df = ctx.matches_for(years)
         mask = (
             ((df["team1"] == teamA) & (df["team2"] == teamB)) |
             ((df["team1"] == teamB) & (df["team2"] == teamA))
@@ -104,6 +90,7 @@ def register_team_stats_routes(app,
         ]
 
     @app.route("/api/team_stats")
+    @cached
     def team_stats():
         team  = request.args.get("team", "").strip()
         years = request.args.get("years", "all").strip()
@@ -116,6 +103,7 @@ def register_team_stats_routes(app,
         return jsonify(result)
 
     @app.route("/api/team_stats_compare")
+    @cached
     def team_stats_compare():
         teamA = request.args.get("teamA", "").strip()
         teamB = request.args.get("teamB", "").strip()
@@ -131,6 +119,7 @@ def register_team_stats_routes(app,
         return jsonify({"teamA": statsA, "teamB": statsB})
 
     @app.route("/api/team_vs_team")
+    @cached
     def team_vs_team():
         teamA = request.args.get("teamA", "").strip()
         teamB = request.args.get("teamB", "").strip()
@@ -145,78 +134,85 @@ def register_team_stats_routes(app,
         return jsonify({"teamA": teamA, "teamB": teamB, "stats": stats})
 
     @app.route("/api/team_overview")
+    @cached
     def team_overview():
         team  = request.args.get("team", "").strip()
         years = request.args.get("years", "all").strip()
         if not team:
             return jsonify({"error": "Please provide a team name"}), 400
 
-        df = _filter_by_years(df_all, years)
-        df_team = df[(df["team1"] == team) | (df["team2"] == team)]
+        with span("team_overview.filter", team=team, years=years):
+            df = ctx.matches_for(years)
+            df_team = df[(df["team1"] == team) | (df["team2"] == team)]
         if df_team.empty:
             return jsonify({"error": f"No matches for '{team}' in {years}"}), 404
 
-        match_ids = df_team["id"].tolist()
-        df_del = deliveries[deliveries["match_id"].isin(match_ids)]
-
-        # 1) Top 5 run-scorers
-        df_bat = df_del[df_del["batting_team"] == team]
-        top5_bat = (
-            df_bat.groupby("batter")["batsman_runs"]
-                  .sum()
-                  .nlargest(5)
-                  .reset_index(name="runs")
-                  .to_dict("records")
-        )
-
-        # 2) Top 5 wicket-takers
-        df_bowl = df_del[
-            (df_del["bowling_team"] == team) &
-            (df_del["dismissal_kind"].isin(WICKET_KINDS))
-        ]
-        top5_bowl = (
-            df_bowl.groupby("bowler")
-                   .size()
-                   .nlargest(5)
-                   .reset_index(name="wickets")
-                   .to_dict("records")
-        )
-
-        # 3) Top 5 successful chases (by highest target_runs)
-        df_chase = df_team[
-            (df_team["winner"] == team) &
-            (df_team["result"].str.lower() == "wickets")
-        ]
-        chase5 = df_chase.nlargest(5, "target_runs")
-        top5_chase = []
-        for _, row in chase5.iterrows():
-            opp = row["team2"] if row["team1"] == team else row["team1"]
-            top5_chase.append({
-                "opposition": opp,
-                "target":     row["target_runs"]
-            })
-
-        # 4) Top 5 defenses (lowest total defended first)
-        df_def = df_team[
-            (df_team["winner"] == team) &
-            (df_team["result"].str.lower() == "runs") &
-            (df_team["method"].fillna("").str.lower() != "d/l") &
-            (df_team["target_overs"] == 20)
-        ]
-        def5 = df_def.nsmallest(5, "target_runs")
-        top5_def = []
-        for _, row in def5.iterrows():
-            opp = row["team2"] if row["team1"] == team else row["team1"]
-            top5_def.append({
-                "opposition": opp,
-                "target":     row["target_runs"]
+        with span("team_overview.deliveries"):
+            match_ids = df_team["id"].tolist()
+            deliveries = ctx.deliveries
+            df_del = deliveries[deliveries["match_id"].isin(match_ids)]
+
+        with span("team_overview.top_players"):
+            # 1) Top 5 run-scorers
+            df_bat = df_del[df_del["batting_team"] == team]
+            top5_bat = (
+                df_bat.groupby("batter", observed=True)["batsman_runs"]
+                      .sum()
+                      .nlargest(5)
+                      .reset_index(name="runs")
+            )
+
+            # 2) Top 5 wicket-takers
+            df_bowl = df_del[
+                (df_del["bowling_team"] == team) &
+                (df_del["bowler_wicket"])
+            ]
+            top5_bowl = (
+                df_bowl.groupby("bowler", observed=True)
+                       .size()
+                       .nlargest(5)
+                       .reset_index(name="wickets")
+            )
+
+        with span("team_overview.chases_defenses"):
+            # 3) Top 5 successful chases (by highest target_runs)
+            df_chase = df_team[
+                (df_team["winner"] == team) &
+                (df_team["result"].str.lower() == "wickets")
+            ]
+            chase5 = df_chase.nlargest(5, "target_runs")
+            top5_chase = []
+            for _, row in chase5.iterrows():
+                opp = row["team2"] if row["team1"] == team else row["team1"]
+                top5_chase.append({
+                    "opposition": opp,
+                    "target":     row["target_runs"]
+                })
+
+            # 4) Top 5 defenses (lowest total defended first)
+            df_def = df_team[
+                (df_team["winner"] == team) &
+                (df_team["result"].str.lower() == "runs") &
+                (df_team["method"].fillna("").str.lower() != "d/l") &
+                (df_team["target_overs"] == 20)
+            ]
+            def5 = df_def.nsmallest(5, "target_runs")
+            top5_def = []
+            for _, row in def5.iterrows():
+                opp = row["team2"] if row["team1"] == team else row["team1"]
+                top5_def.append({
+                    "opposition": opp,
+                    "target":     row["target_runs"]
+                })
+
+        with span("team_overview.jsonify"):
+            return jsonify({
+                "team":          team,
+                # canonical, not raw: every spelling the result cache and
+                # ETag treat as one request gets the same bytes
+                "years":         years_label(canonical_years(years)),
+                "top5_batters":  top5_bat,
+                "top5_bowlers":  top5_bowl,
+                "top5_chases":   top5_chase,
+                "top5_defenses": top5_def
             })
-
-        return jsonify({
-            "team":          team,
-            "years":         years,
-            "top5_batters":  top5_bat,
-            "top5_bowlers":  top5_bowl,
-            "top5_chases":   top5_chase,
-            "top5_defenses": top5_def
-        })
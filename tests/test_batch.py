@@ -0,0 +1,37 @@
+# test_batch.py
+
+from flask import Flask, jsonify, request
+
+from batch import register_batch_routes
+from data_handle import DataHandle, register_data_handle
+from metrics import register_metrics
+from result_cache import cached, register_result_cache
+
+
+class Version:
+    """A stand-in DataContext."""
+    version = "v1"
+
+
+def test_batch_counts_once_in_metrics():
+    app = Flask(__name__)
+    handle = DataHandle(Version(), register_result_cache(app))
+    metrics = register_metrics(app, handle.proxy)
+    register_data_handle(app, handle)
+    register_batch_routes(app)
+
+    @app.route("/api/echo")
+    @cached
+    def echo():
+        return jsonify({"years": request.args.get("years"), "version": handle.proxy.version})
+
+    resp = app.test_client().post("/api/batch", json={"requests": [
+        {"route": "/api/echo", "params": {"years": "2020"}},
+        {"route": "/api/echo", "params": {"years": "2021"}},
+        {"route": "/api/echo", "params": {"years": "2022"}},
+    ]})
+    assert resp.status_code == 200
+    assert [r["body"]["years"] for r in resp.get_json()["results"]] == ["2020", "2021", "2022"]
+
+    counts = {key: values[1] for key, values in metrics.snapshot().items()}
+    assert counts == {("/api/batch", "POST"): 1}
@@ -0,0 +1,83 @@
+# test_http_cache.py
+
+import pytest
+from flask import Flask, jsonify
+
+from http_cache import no_store, register_http_cache
+
+
+class Version:
+    """A stand-in DataContext."""
+    version = "v1"
+
+
+@pytest.fixture
+def served():
+    app = Flask(__name__)
+    ctx = Version()
+    register_http_cache(app, ctx)
+    calls = []
+
+    @app.route("/api/ok")
+    def ok():
+        calls.append("ok")
+        return jsonify({"ok": True})
+
+    @app.route("/api/random")
+    def random():
+        no_store()
+        return jsonify({"draw": 4})
+
+    @app.route("/api/bad")
+    def bad():
+        return jsonify({"error": "Provide a valid year"}), 400
+
+    return app.test_client(), ctx, calls
+
+
+def test_success_gets_validators(served):
+    client, _, _ = served
+    resp = client.get("/api/ok?years=2024,2023")
+    etag, weak = resp.get_etag()
+    assert etag and not weak
+    assert resp.cache_control.public and resp.cache_control.max_age == 300
+    # equivalent ?years= spellings share the ETag
+    assert client.get("/api/ok?years=2023,2024").get_etag() == (etag, False)
+
+
+@pytest.mark.parametrize("weak", [False, True])
+def test_matching_if_none_match_is_304(served, weak):
+    client, _, calls = served
+    etag = client.get("/api/ok").get_etag()[0]
+    header = f'W/"{etag}"' if weak else f'"{etag}"'
+    resp = client.get("/api/ok", headers={"If-None-Match": header})
+    assert resp.status_code == 304
+    assert resp.get_etag()[0] == etag
+    assert calls == ["ok"]      # answered without running the view
+
+
+def test_other_etag_or_version_is_200(served):
+    client, ctx, _ = served
+    etag = client.get("/api/ok").get_etag()[0]
+    assert client.get("/api/ok", headers={"If-None-Match": '"other"'}).status_code == 200
+    ctx.version = "v2"
+    resp = client.get("/api/ok", headers={"If-None-Match": f'"{etag}"'})
+    assert resp.status_code == 200
+    assert resp.get_etag()[0] != etag
+
+
+def test_no_store_gets_no_etag(served):
+    client, _, _ = served
+    resp = client.get("/api/random")
+    assert resp.get_etag() == (None, None)
+    assert resp.cache_control.no_store
+    assert not resp.cache_control.public
+
+
+@pytest.mark.parametrize("path", ["/api/bad", "/api/missing"])
+def test_errors_get_no_validators(served, path):
+    client, _, _ = served
+    resp = client.get(path)
+    assert resp.status_code in (400, 404)
+    assert resp.get_etag() == (None, None)
+    assert "Cache-Control" not in resp.headers
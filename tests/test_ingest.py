@@ -0,0 +1,131 @@
+# test_ingest.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask, jsonify, request
+
+from compact import compact_frames
+from data_handle import DataHandle, register_data_handle
+from datastore import DataContext
+from result_cache import cached, register_result_cache
+from snapshot import read_csvs
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+class Seasons:
+    """A stand-in DataContext: rows per season."""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+
+
+@pytest.fixture
+def served():
+    app = Flask(__name__)
+    handle = DataHandle(Seasons("v1", {2023: ["a"], 2024: ["b"]}), register_result_cache(app))
+    register_data_handle(app, handle)
+    ctx = handle.proxy
+
+    @app.route("/api/rows")
+    @cached
+    def rows():
+        return jsonify({"version": ctx.version,
+                        "rows": ctx.rows.get(int(request.args["years"]), [])})
+
+    return app, handle
+
+
+def test_pinned_request_does_not_cache_replaced_data(served):
+    app, handle = served
+    with app.test_request_context("/api/rows?years=2024"):
+        app.preprocess_request()        # pinned to v1
+        with handle.caches.invalidating([2024]):
+            handle.swap(Seasons("v2", {2023: ["a"]}))
+        old = app.make_response(app.dispatch_request()).get_json()
+    assert old == {"version": "v1", "rows": ["b"]}
+
+    fresh = app.test_client().get("/api/rows?years=2024").get_json()
+    assert fresh == {"version": "v2", "rows": []}
+
+
+def test_no_stale_hit_between_swap_and_invalidation(served):
+    app, handle = served
+    client = app.test_client()
+    assert client.get("/api/rows?years=2024").get_json()["rows"] == ["b"]   # cached
+
+    with handle.caches.invalidating([2024]):
+        handle.swap(Seasons("v2", {2023: ["a"]}))
+        during = client.get("/api/rows?years=2024").get_json()
+    assert during == {"version": "v2", "rows": []}
+    assert client.get("/api/rows?years=2024").get_json() == during
+
+
+def test_invalidation_keeps_other_seasons(served):
+    app, handle = served
+    client = app.test_client()
+    client.get("/api/rows?years=2023")
+    with handle.caches.invalidating([2024]):
+        handle.swap(Seasons("v2", {2023: ["a"]}))
+    client.get("/api/rows?years=2023")
+    assert handle.caches.stats()["rows"]["hits"] == 1
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return read_csvs(DATA_DIR)
+
+
+def _assert_same_frame(a: pd.DataFrame, b: pd.DataFrame, name: str):
+    # DataFrame.equals rather than assert_frame_equal, which boxes every
+    # categorical cell; categories are compared in order, codes included
+    assert a.index.equals(b.index) and list(a.columns) == list(b.columns), name
+    for col in a.columns:
+        x, y = a[col], b[col]
+        assert x.dtype == y.dtype, f"{name}.{col}"
+        if isinstance(x.dtype, pd.CategoricalDtype):
+            assert x.cat.categories.equals(y.cat.categories), f"{name}.{col}"
+            np.testing.assert_array_equal(x.cat.codes, y.cat.codes, err_msg=f"{name}.{col}")
+        else:
+            assert x.equals(y), f"{name}.{col}"
+
+
+def _assert_same_context(a: DataContext, b: DataContext):
+    for name in ("matches", "deliveries", "ledger", "cube", "innings"):
+        _assert_same_frame(getattr(a, name), getattr(b, name), name)
+    for name in ("match_offsets", "delivery_offsets", "ledger_offsets", "cube_offsets", "seasons"):
+        assert getattr(a, name) == getattr(b, name), name
+    # NRR can be NaN, which == never matches
+    assert a.points_tables.keys() == b.points_tables.keys()
+    for season, table in a.points_tables.items():
+        pd.testing.assert_frame_equal(pd.DataFrame(table), pd.DataFrame(b.points_tables[season]))
+    for role in ("batter", "bowler", "fielder"):
+        for part in (0, 1):
+            np.testing.assert_array_equal(a.player_index[role][part], b.player_index[role][part])
+    assert a.names.matches == b.names.matches
+
+
+@pytest.mark.parametrize("held", ["last match", "new season", "mid-history match"])
+def test_extend_equals_a_full_build(raw, held):
+    matches, deliveries = raw
+    seasons = pd.to_datetime(matches["date"]).dt.year
+    ids = {
+        "last match":        matches.sort_values("date")["id"].tail(1),
+        "new season":        matches.loc[seasons == seasons.max(), "id"],
+        "mid-history match": matches.loc[seasons == 2010, "id"].iloc[5:6],
+    }[held]
+    new_m = matches[matches["id"].isin(ids)]
+    new_d = deliveries[deliveries["match_id"].isin(ids)].copy()
+    # a player the base data has never seen
+    new_d.loc[new_d.index[:30], "batter"] = "AA Newcomer"
+    new_m_all = pd.concat([matches[~matches["id"].isin(ids)], new_m])
+    new_d_all = pd.concat([deliveries[~deliveries["match_id"].isin(ids)], new_d])
+
+    base = DataContext(*compact_frames(matches[~matches["id"].isin(ids)],
+                                       deliveries[~deliveries["match_id"].isin(ids)]), "v0")
+    extended = base.extend(new_m, new_d, "v1")
+    _assert_same_context(extended, DataContext(*compact_frames(new_m_all, new_d_all), "v1"))
@@ -0,0 +1,30 @@
+# test_leaderboard.py
+
+import numpy as np
+import pytest
+
+from leaderboard import top_k
+
+
+def test_ties_across_k_keep_name_order():
+    # three 7s straddle k=3 (positions 2, 3 and 5); the first wins
+    values = np.array([5, 9, 7, 7, 3, 7, 9, 1], dtype=float)
+    assert top_k(values, 3).tolist() == [1, 6, 2]
+    assert top_k(values, 4).tolist() == [1, 6, 2, 3]
+    assert top_k(values, 2, ascending=True).tolist() == [7, 4]
+
+
+def test_k_past_the_end_ranks_everything():
+    values = np.array([2.0, 2.0, 1.0])
+    assert top_k(values, 10).tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize("ascending", [False, True])
+def test_matches_a_stable_full_sort(ascending):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        values = rng.integers(0, 5, size=rng.integers(1, 40)).astype(float)
+        k = int(rng.integers(1, len(values) + 2))
+        key = values if ascending else -values
+        expected = np.argsort(key, kind="stable")[:k]
+        assert top_k(values, k, ascending).tolist() == expected.tolist()
@@ -0,0 +1,33 @@
+# test_player_names.py
+
+import pandas as pd
+
+from player_names import PlayerNameIndex
+
+
+def _index(matches: dict) -> PlayerNameIndex:
+    """An index over deliveries where each player bats in `matches[name]` matches."""
+    rows = [(m, name) for name, n in matches.items() for m in range(n)]
+    names = sorted(matches)
+    batters = pd.Categorical([name for _, name in rows], categories=names)
+    return PlayerNameIndex(pd.DataFrame({
+        "match_id": [m for m, _ in rows],
+        "batter":   batters,
+        "bowler":   pd.Categorical([None] * len(rows), categories=names),
+    }))
+
+
+def test_suggest_ranks_the_whole_prefix_range():
+    # 300 one-match players sort ahead of the most-capped one
+    matches = {f"Ab Player {n:03d}": 1 for n in range(300)}
+    matches["Abz Star"] = 50
+    matches["Abz Regular"] = 20
+    index = _index(matches)
+
+    names = [s["name"] for s in index.suggest("ab", limit=3)]
+    assert names == ["Abz Star", "Abz Regular", "Ab Player 000"]
+
+
+def test_suggest_matches_surnames_and_ties_by_name():
+    index = _index({"V Kohli": 5, "A Kohli": 5, "K Kohlberg": 9, "Z Other": 30})
+    assert [s["name"] for s in index.suggest("kohl")] == ["K Kohlberg", "A Kohli", "V Kohli"]
@@ -0,0 +1,113 @@
+# test_result_cache.py
+
+from flask import Flask, jsonify, request
+
+from result_cache import ENTRY_OVERHEAD, CacheRegistry, ResultCache, cached, register_result_cache
+
+
+def _keys(cache: ResultCache) -> set:
+    return set(cache._entries)
+
+
+def test_evicts_cheapest_per_byte_first():
+    cache = ResultCache(max_bytes=300)
+    cache.put("slow", 1, size=100, cost=1.0)
+    cache.put("cheap", 2, size=100, cost=0.001)
+    cache.put("medium", 3, size=100, cost=0.5)
+    cache.put("new", 4, size=100, cost=0.5)
+    assert _keys(cache) == {"slow", "medium", "new"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_equal_cost_per_byte_is_lru():
+    cache = ResultCache(max_bytes=300)
+    for key in "abc":
+        cache.put(key, key, size=100, cost=0.1)
+    assert cache.get("a") == "a"        # b is now the least recently used
+    cache.put("d", "d", size=100, cost=0.1)
+    assert _keys(cache) == {"a", "c", "d"}
+
+
+def test_large_cheap_result_goes_before_small_costly_ones():
+    cache = ResultCache(max_bytes=1000)
+    cache.put("small", 1, size=100, cost=0.1)
+    cache.put("large", 2, size=800, cost=0.1)
+    cache.put("next", 3, size=200, cost=0.1)
+    assert _keys(cache) == {"small", "next"}
+    assert cache.bytes == 300
+
+
+def test_over_budget_values_are_skipped():
+    cache = ResultCache(max_bytes=100)
+    cache.put("a", 1, size=50, cost=0.1)
+    cache.put("huge", 2, size=101, cost=10.0)
+    assert _keys(cache) == {"a"}
+
+
+def test_invalidate_drops_only_dependent_seasons():
+    registry = CacheRegistry()
+    scoped = registry.for_endpoint("scoped")
+    unscoped = registry.for_endpoint("unscoped", season_scoped=False)
+    for seasons in (frozenset({2023}), frozenset({2023, 2024}), None):
+        scoped.put((seasons, ()), "x", 10, 0.1)
+        unscoped.put((seasons, ()), "x", 10, 0.1)
+
+    assert registry.invalidate([2024]) == 2 + 3
+    assert _keys(scoped) == {(frozenset({2023}), ())}
+    assert not _keys(unscoped)
+    assert registry.generation == 2
+
+    assert registry.invalidate() == 1
+    assert not _keys(scoped)
+
+
+def test_put_refused_when_guard_fails():
+    cache = ResultCache()
+    cache.put("a", 1, size=10, cost=0.1, valid=lambda: False)
+    assert cache.get("a") is None
+
+
+def _app():
+    app = Flask(__name__)
+    registry = register_result_cache(app)
+    calls = []
+
+    @app.route("/api/seasons")
+    @cached
+    def seasons():
+        calls.append(request.args.get("years"))
+        if request.args.get("invalidate"):
+            registry.invalidate()        # data replaced while the view runs
+        return jsonify(len(calls))
+
+    return app, registry, calls
+
+
+def test_equivalent_season_spellings_share_an_entry():
+    app, registry, calls = _app()
+    client = app.test_client()
+    first = client.get("/api/seasons?years=2024,2023").get_data()
+    assert client.get("/api/seasons?years=2023, 2024,2023").get_data() == first
+    assert len(calls) == 1
+    assert registry.for_endpoint("seasons").bytes == len(first) + ENTRY_OVERHEAD
+
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    app, registry, calls = _app()
+    client = app.test_client()
+    client.get("/api/seasons?years=2024&invalidate=1")
+    client.get("/api/seasons?years=2024&invalidate=1")
+    assert len(calls) == 2
+    assert not _keys(registry.for_endpoint("seasons"))
+
+
+def test_no_caching_while_invalidating():
+    app, registry, calls = _app()
+    client = app.test_client()
+    with registry.invalidating([2024]):
+        client.get("/api/seasons?years=2023")
+        client.get("/api/seasons?years=2023")
+    assert len(calls) == 2
+    client.get("/api/seasons?years=2023")
+    client.get("/api/seasons?years=2023")
+    assert len(calls) == 3
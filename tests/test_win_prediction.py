@@ -0,0 +1,61 @@
+# test_win_prediction.py
+
+import json
+
+import pytest
+from flask import Flask
+
+from win_prediction import _parse_roles, _strict_roles, register_routes
+
+TEAM = [f"Player {i}" for i in range(11)]
+ROLES = ["bat"] * 5 + ["all"] * 3 + ["bowl"] * 3
+
+# roles that must be refused for an eleven-player team
+MALFORMED = [
+    "5",                                # JSON number
+    '{"bat": 5}',                       # JSON object
+    '"bat"',                            # JSON string
+    "Batsman,Bowler",                   # not JSON at all
+    json.dumps(ROLES[:10]),             # one role short
+    json.dumps(ROLES + ["bat"]),        # one role too many
+    json.dumps(ROLES[:10] + ["keeper"]),
+    json.dumps(ROLES[:10] + [1]),
+    json.dumps(ROLES[:10] + [["bat"]]),
+    5, {"bat": 5}, ROLES[:10],
+]
+
+
+@pytest.fixture
+def client():
+    # malformed requests are refused before any data is read
+    app = Flask(__name__)
+    register_routes(app, ctx=None)
+    return app.test_client()
+
+
+def test_strict_roles_accepts_lists_and_json():
+    assert _strict_roles(ROLES, TEAM) == ROLES
+    assert _strict_roles(json.dumps(ROLES), TEAM) == ROLES
+    assert _strict_roles(None, TEAM) == ["all"] * 11
+    assert _strict_roles("", TEAM) == ["all"] * 11
+
+
+@pytest.mark.parametrize("raw", MALFORMED)
+def test_strict_roles_rejects(raw):
+    with pytest.raises(ValueError):
+        _strict_roles(raw, TEAM)
+
+
+def test_get_roles_still_fall_back():
+    # the single-lineup GET route reads roles as it always has
+    assert _parse_roles("Batsman,Bowler", TEAM) == ["all"] * 11
+    assert _parse_roles(json.dumps(ROLES), TEAM) == ROLES
+
+
+@pytest.mark.parametrize("raw", MALFORMED)
+def test_batch_rejects_malformed_roles(client, raw):
+    good = {"team1": TEAM, "roles1": ROLES, "team2": TEAM}
+    resp = client.post("/api/win_prediction/batch",
+                       json={"jobs": [good, {**good, "roles2": raw}]})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith("Job 1: roles2: ")
@@ -1,23 +1,220 @@
 # win_prediction.py
 
 from flask import jsonify, request
-from playerValue import compute_career_average_points
+from datastore import canonical_years, years_label
+from http_cache import no_store
+from result_cache import cached
+from playerValue import career_averages
+import numpy as np
 import json
 
-def player_points(player, years="all"):
+ROLES = ("bat", "bowl", "all")
+
+# upper bound on lineups scored by one /api/win_prediction/batch call
+MAX_BATCH_JOBS = 5000
+
+ZERO_POINTS = (0.0, 0.0, 0.0)
+
+# mode=simulate: default and maximum number of simulated matches
+DEFAULT_SIMS = 10000
+MAX_SIMS = 100000
+
+
+def _parse_team(raw):
+    if isinstance(raw, list):
+        return [str(p) for p in raw]
+    if isinstance(raw, str) and raw:
+        return raw.split(",")
+    return []
+
+
+def _parse_roles(raw, team):
+    """Roles as a list, a JSON-encoded list, or missing (→ all "all")."""
+    if isinstance(raw, list):
+        return raw
+    if raw:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            pass
+    return ["all"] * len(team)
+
+
+def _strict_roles(raw, team):
+    """
+    Like _parse_roles, but raises ValueError unless there is exactly one
+    role from ROLES per player (batch jobs).
+    """
+    if isinstance(raw, str) and raw:
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raw = None
+    elif raw is None or raw == "":
+        return ["all"] * len(team)
+    if not (isinstance(raw, list) and len(raw) == len(team)
+            and all(isinstance(r, str) and r in ROLES for r in raw)):
+        raise ValueError(f"expected a list of {len(team)} roles, each one of {', '.join(ROLES)}")
+    return raw
+
+
+def _team_totals(lineup, roles, points):
+    bat = bowl = fld = 0.0
+    for p, role in zip(lineup, roles):
+        b, bo, f = points.get(p, ZERO_POINTS)
+        if role in ("bat", "all"):
+            bat  += b
+        if role in ("bowl","all"):
+            bowl += bo
+        # always count fielding
+        fld  += f
+    return bat, bowl, fld
+
+
+def _summary(t1, t2):
+    t1_bat, t1_bowl, t1_fld = t1
+    t2_bat, t2_bowl, t2_fld = t2
+
+    # total “score” for probability
+    t1_total = t1_bat + t1_bowl + t1_fld
+    t2_total = t2_bat + t2_bowl + t2_fld
+    total_sum = t1_total + t2_total
+    p1 = (t1_total / total_sum * 100) if total_sum > 0 else 50
+    p2 = 100 - p1
+
+    return {
+        "team1": {
+          "batting":  round(t1_bat,2),
+          "bowling":  round(t1_bowl,2),
+          "fielding": round(t1_fld,2),
+          "total":    round(t1_total,2),
+          "prob":     round(p1,2)
+        },
+        "team2": {
+          "batting":  round(t2_bat,2),
+          "bowling":  round(t2_bowl,2),
+          "fielding": round(t2_fld,2),
+          "total":    round(t2_total,2),
+          "prob":     round(p2,2)
+        }
+    }
+
+
+def score_matchups(ctx, jobs):
+    """
+    Score many (team1, roles1, team2, roles2, years) jobs at once.
+    Every distinct raw name is resolved once, and career averages are
+    computed once per distinct season set, so the per-job cost is just
+    summing 22 looked-up tuples.
+    """
+    resolved = {}
+    by_years = {}
+    for job in jobs:
+        key = years_label(canonical_years(job["years"]))
+        names = by_years.setdefault(key, set())
+        for raw in job["team1"] + job["team2"]:
+            if raw not in resolved:
+                resolved[raw] = ctx.names.resolve(raw, require_initial=True)
+            names.add(raw)
+        job["_years_key"] = key
+
+    points = {}
+    for key, names in by_years.items():
+        avgs = career_averages(ctx, key)
+        table = {
+            player: (float(b), float(bo), float(f))
+            for player, b, bo, f in avgs.itertuples(name=None)
+        }
+        points[key] = {raw: table.get(resolved[raw], ZERO_POINTS) for raw in names}
+
+    return [
+        _summary(
+            _team_totals(job["team1"], job["roles1"], points[job["_years_key"]]),
+            _team_totals(job["team2"], job["roles2"], points[job["_years_key"]])
+        )
+        for job in jobs
+    ]
+
+
+def _slot_samples(ctx, slots, years):
     """
-    Returns a dict: { 'batting': x, 'bowling': y, 'fielding': z }
-    for the given player over `years`.
+    Historical per-match points for each lineup slot (raw name, role),
+    role-weighted like _team_totals: batting if "bat"/"all", bowling if
+    "bowl"/"all", fielding always, and 0 for a category the player didn't
+    take part in that match. Returns one flat float32 array plus each
+    slot's (offset, count); a slot with no history gets a single 0 sample.
     """
-    pts = compute_career_average_points(deliveries, matches, player, years)
-    # Expect pts to be a dict with keys 'batting','bowling','fielding'
-    return (
-        float(pts.get("batting", 0.0)),
-        float(pts.get("bowling", 0.0)),
-        float(pts.get("fielding", 0.0))
+    led = ctx.ledger_for(years)
+    categories = led["player"].cat.categories
+    players = [ctx.names.resolve(raw, require_initial=True) or "" for raw, _ in slots]
+    wanted = categories.get_indexer(players)
+
+    # the ledger rows of the lineup's players, grouped by player code
+    codes = led["player"].cat.codes.to_numpy()
+    mask = np.isin(codes, wanted[wanted >= 0])
+    sub_codes = codes[mask]
+    order = np.argsort(sub_codes, kind="stable")
+    sub_codes = sub_codes[order]
+    pts = np.nan_to_num(
+        led.loc[mask, ["batting_pts", "bowling_pts", "fielding_pts"]]
+           .to_numpy("float32")[order]
     )
 
-def register_routes(app, deliveries_df, matches_df):
+    values, offsets, counts = [], [], []
+    total = 0
+    for (_, role), code in zip(slots, wanted):
+        start = np.searchsorted(sub_codes, code, side="left")
+        stop = np.searchsorted(sub_codes, code, side="right") if code >= 0 else start
+        weights = np.array([role in ("bat", "all"), role in ("bowl", "all"), True], dtype="float32")
+        v = pts[start:stop] @ weights if stop > start else np.zeros(1, dtype="float32")
+        values.append(v)
+        offsets.append(total)
+        counts.append(len(v))
+        total += len(v)
+    return np.concatenate(values), np.array(offsets), np.array(counts)
+
+
+def simulate_matchup(ctx, job, sims=DEFAULT_SIMS, seed=None):
+    """
+    Monte Carlo win probability: each simulated match draws one historical
+    match for every player (uniformly from their matches in `years`) and
+    the side with more points wins; ties count half. All draws are one
+    players x sims matrix. Returns the score_matchups() result with each
+    team's "prob" replaced by the simulated one, plus a 95% interval.
+    """
+    result = score_matchups(ctx, [dict(job)])[0]
+
+    slots = [(p, r) for p, r in zip(job["team1"], job["roles1"])]
+    n1 = len(slots)
+    slots += [(p, r) for p, r in zip(job["team2"], job["roles2"])]
+    if not slots:
+        return result
+
+    values, offsets, counts = _slot_samples(ctx, slots, job["years"])
+    rng = np.random.default_rng(seed)
+    # uniform draws in [0, count) per slot; float32 uniforms scaled and
+    # truncated are ~3x cheaper than rng.integers with per-row bounds
+    u = rng.random((len(slots), sims), dtype=np.float32)
+    u *= counts[:, None].astype(np.float32)
+    picks = np.minimum(u.astype(np.int32), (counts - 1)[:, None].astype(np.int32))
+    picks += offsets[:, None].astype(np.int32)
+    draws = values[picks]
+    t1 = draws[:n1].sum(axis=0)
+    t2 = draws[n1:].sum(axis=0)
+
+    p1 = float(np.count_nonzero(t1 > t2) + 0.5 * np.count_nonzero(t1 == t2)) / sims
+    half = 1.96 * (p1 * (1 - p1) / sims) ** 0.5
+    lo, hi = max(p1 - half, 0.0), min(p1 + half, 1.0)
+
+    result["team1"]["prob"] = round(p1 * 100, 2)
+    result["team1"]["prob_ci95"] = [round(lo * 100, 2), round(hi * 100, 2)]
+    result["team2"]["prob"] = round(100 - p1 * 100, 2)
+    result["team2"]["prob_ci95"] = [round(100 - hi * 100, 2), round(100 - lo * 100, 2)]
+    result["simulations"] = sims
+    return result
+
+
+def register_routes(app, ctx):
     """
     Register /api/win_prediction which takes:
       - team1: comma-sep list of 11 player names
@@ -25,13 +222,12 @@ def register_routes(app, deliveries_df, matches_df):
       - roles1: JSON list of 11 roles ("bat"|"bowl"|"all")
       - roles2: same for team2
       - years: optional comma-sep list or "all"
+      - mode: optional "simulate" for a Monte Carlo probability, with
+        sims (default 10000, at most 100000) and an optional integer seed
     Returns batting, bowling, fielding subtotals and overall probabilities.
     """
-    # stash these for player_points
-    global deliveries, matches
-    deliveries, matches = deliveries_df, matches_df
-
     @app.route("/api/win_prediction")
+    @cached(season_scoped=False)
     def win_prediction():
         # parse teams
         team1 = request.args.get("team1", "")
@@ -64,63 +260,66 @@ def register_routes(app, deliveries_df, matches_df):
         else:
             team2 = team2.split(",")
 
-        # parse roles if provided
-        if roles1:
+        roles1 = _parse_roles(roles1, team1)
+        roles2 = _parse_roles(roles2, team2)
+
+        job = {
+            "team1": team1, "roles1": roles1,
+            "team2": team2, "roles2": roles2,
+            "years": years
+        }
+        if request.args.get("mode") == "simulate":
             try:
-                roles1 = json.loads(roles1)
+                sims = int(request.args.get("sims", DEFAULT_SIMS))
+                seed = request.args.get("seed")
+                seed = int(seed) if seed is not None else None
             except ValueError:
-                roles1 = ["all"] * len(team1)
-        else:
-            roles1 = ["all"] * len(team1)
-        if roles2:
+                return jsonify({"error": "sims and seed must be integers"}), 400
+            sims = min(max(sims, 1), MAX_SIMS)
+            if seed is None:
+                # a fresh random draw every time; never cache it
+                no_store()
+            return jsonify(simulate_matchup(ctx, job, sims, seed))
+
+        return jsonify(score_matchups(ctx, [job])[0])
+
+    @app.route("/api/win_prediction/batch", methods=["POST"])
+    def win_prediction_batch():
+        """
+        Body: {"jobs": [{"team1": [...], "roles1": [...], "team2": [...],
+                         "roles2": [...], "years": "all"}, ...]}
+        Teams may also be comma-separated strings; roles default to "all".
+        Returns {"results": [...]} in job order, each shaped like the
+        single /api/win_prediction response.
+        """
+        body = request.get_json(silent=True)
+        jobs = body.get("jobs") if isinstance(body, dict) else body
+        if not isinstance(jobs, list) or not jobs:
+            return jsonify({"error": "Provide a non-empty list of jobs"}), 400
+        if len(jobs) > MAX_BATCH_JOBS:
+            return jsonify({"error": f"At most {MAX_BATCH_JOBS} jobs per request"}), 400
+
+        parsed = []
+        for n, job in enumerate(jobs):
+            if not isinstance(job, dict):
+                return jsonify({"error": f"Job {n} is not an object"}), 400
+            team1 = _parse_team(job.get("team1"))
+            team2 = _parse_team(job.get("team2"))
+            if not team1 or not team2:
+                return jsonify({"error": f"Job {n}: provide both team1 and team2"}), 400
             try:
-                roles2 = json.loads(roles2)
-            except ValueError:
-                roles2 = ["all"] * len(team2)
-        else:
-            roles2 = ["all"] * len(team2)
-
-        # accumulate
-        t1_bat = t1_bowl = t1_fld = 0.0
-        for p, role in zip(team1, roles1):
-            b, bo, f = player_points(p, years)
-            if role in ("bat", "all"):
-                t1_bat  += b
-            if role in ("bowl","all"):
-                t1_bowl += bo
-            # always count fielding
-            t1_fld  += f
-
-        t2_bat = t2_bowl = t2_fld = 0.0
-        for p, role in zip(team2, roles2):
-            b, bo, f = player_points(p, years)
-            if role in ("bat", "all"):
-                t2_bat  += b
-            if role in ("bowl","all"):
-                t2_bowl += bo
-            t2_fld  += f
-
-        # total “score” for probability
-        t1_total = t1_bat + t1_bowl + t1_fld
-        t2_total = t2_bat + t2_bowl + t2_fld
-        total_sum = t1_total + t2_total
-        p1 = (t1_total / total_sum * 100) if total_sum > 0 else 50
-        p2 = 100 - p1
-
-        return jsonify({
-            "team1": {
-              "batting":  round(t1_bat,2),
-              "bowling":  round(t1_bowl,2),
-              "fielding": round(t1_fld,2),
-              "total":    round(t1_total,2),
-              "prob":     round(p1,2)
-            },
-            "team2": {
-              "batting":  round(t2_bat,2),
-              "bowling":  round(t2_bowl,2),
-              "fielding": round(t2_fld,2),
-              "total":    round(t2_total,2),
-              "prob":     round(p2,2)
-            }
-        })
+                roles1 = _strict_roles(job.get("roles1"), team1)
+            except ValueError as e:
+                return jsonify({"error": f"Job {n}: roles1: {e}"}), 400
+            try:
+                roles2 = _strict_roles(job.get("roles2"), team2)
+            except ValueError as e:
+                return jsonify({"error": f"Job {n}: roles2: {e}"}), 400
+            parsed.append({
+                "team1": team1, "roles1": roles1,
+                "team2": team2, "roles2": roles2,
+                "years": str(job.get("years", "all"))
+            })
+
+        return jsonify({"results": score_matchups(ctx, parsed)})
 
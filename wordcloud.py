@@ -1,17 +1,20 @@
 from flask import request, jsonify, current_app
-import pandas as pd
+from profiling import span
+from result_cache import cached
 from pointValue import compute_top25_players  # now bundled in pointValue.py
 
-def register_wordcloud_routes(app, matches: pd.DataFrame, deliveries: pd.DataFrame):
+def register_wordcloud_routes(app, ctx):
     @app.route("/api/wordcloud")
+    @cached
     def wordcloud():
         years = request.args.get("years", "all").strip()
         try:
-            df_top = compute_top25_players(deliveries, matches, years)
+            df_top = compute_top25_players(ctx, years)
         except Exception:
             current_app.logger.exception("bulk MVP failure")
             return jsonify({"error": "Failed computing MVPs"}), 500
 
-        out = [{"text": r["player"], "size": r["avg_points"]} 
-               for _, r in df_top.iterrows()]
-        return jsonify(out)
+        with span("wordcloud.jsonify", players=len(df_top)):
+            out = df_top[["player", "avg_points"]].rename(
+                columns={"player": "text", "avg_points": "size"})
+            return jsonify(out)